@@ -0,0 +1,55 @@
+import time
+
+from wsgiref.simple_server import make_server
+
+from pebarest import App
+from pebarest.middleware import Middleware
+from pebarest.models import Resource, Request, Response
+
+
+# App level middleware: adds a header to every response
+class PoweredByMiddleware(Middleware):
+    def after(self, request: Request, response: Response) -> Response:
+        response.headers = {**response.headers, 'X-Powered-By': 'PebaREST'}
+        return response
+
+
+# Plain callables are used as "around" middlewares
+def timing_middleware(request: Request, call_next):
+    started = time.perf_counter()
+    response = call_next(request)
+    response.headers = {**response.headers, 'X-Elapsed': f"{time.perf_counter() - started:.6f}"}
+    return response
+
+
+# Resource level middleware: short-circuits requests without a tenant header
+class RequireTenantMiddleware(Middleware):
+    def before(self, request: Request):
+        if 'X-Tenant' not in request.headers:
+            return Response(400, {'Content-Type': 'application/json'}, {"title": "Missing X-Tenant header."})
+        return None
+
+
+class GreetingResource(Resource):
+    def get(self, request: Request):
+        return {"message": "Hello my little peba!"}
+
+
+class TenantResource(Resource):
+    middlewares = [RequireTenantMiddleware()]
+
+    def get(self, request: Request):
+        return {"tenant": request.headers['X-Tenant']}
+
+
+app = App(__name__, default_headers={'Content-Type': 'application/json'}, is_debug=False)
+app.add_middleware(PoweredByMiddleware())
+app.add_middleware(timing_middleware)
+
+app.add_route('/greeting', GreetingResource())
+app.add_route('/tenant', TenantResource())
+
+
+with make_server('', 8000, app) as httpd:
+    print("Server listening on http://127.0.0.1:8000")
+    httpd.serve_forever()
@@ -1,2 +1,12 @@
 from .models import BaseModel
-from .api import App
+
+
+def __getattr__(name):
+    # App is imported on first use, so `import pebarest.models` doesn't load the application layer.
+    if name == 'App':
+        from .api import App
+        return App
+    raise AttributeError(f"module 'pebarest' has no attribute '{name}'")
+
+
+__all__ = ['App', 'BaseModel']
@@ -1,25 +1,69 @@
-import logging
+import atexit
+import gc
+import os
 import re
+import threading
 
-from typing import Dict, List, Optional, Tuple, Type, Union, Any
+from functools import partial
+from time import perf_counter
 
-from pebarest import BaseModel
+from typing import Callable, Dict, List, Optional, Tuple, Type, Union, Any, TYPE_CHECKING
+
+from pebarest.api.batch import BatchEndpoint
 from pebarest.auth import BaseAuthenticator
-from pebarest.models import Resource, Response, DefaultErrorResponse
+from pebarest.models import BaseModel, Resource, Response, DefaultErrorResponse
 from pebarest.exceptions import RouteAlreadyExistsError, MethodNotAllowedError, NotFoundError, AttrMissingError, \
-    AttrTypeError
-from pebarest.models.response import ErrorResponse
-from pebarest.testing import UnitTestGenerator
-from pebarest.testing.base_test_generator import TestGenerator
-from pebarest.testing.test_client import TestClient
+    AttrTypeError, AppFrozenError, PoolTimeoutError, UnauthorizedError, OffloadTimeoutError, HttpError
+from pebarest.models.http import http_methods_list
+from pebarest.models.request import FIELDS_ENVIRON_KEY
+from pebarest.models.response import ErrorResponse, encoded_error, prepare_status_lines
 from pebarest.utils.caching import CachedProperty
-from pebarest.utils.logging import create_logger
+from pebarest.utils.json import parse_fields, Projection
 from pebarest.utils.routing import compile_path
 
+# The optional subsystems are imported when they are enabled, keeping `import pebarest` light.
+if TYPE_CHECKING:
+    import logging
+
+    from pebarest.debug.memory import MemoryTracker
+    from pebarest.debug.profiling import RequestProfiler, SlowRequestMonitor
+    from pebarest.debug.timing import ServerTiming
+    from pebarest.metrics.http_metrics import HttpMetrics
+    from pebarest.testing.base_test_generator import TestGenerator
+    from pebarest.testing.capture import TrafficCapture
+    from pebarest.testing.test_client import TestClient
+    from pebarest.utils.gc_policy import GcPolicy
+    from pebarest.utils.offload import ProcessOffloader
+    from pebarest.utils.logging import AccessLogger
+    from pebarest.utils.pool import Pool
+
+
+def content_length(environ: dict) -> int:
+    try:
+        return int(environ.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return 0
+
+
+# An error handler is a status code, a (status code, title) tuple or a callable (exception) -> Response.
+ErrorHandler = Union[int, Tuple[int, str], Callable[[Exception], Response]]
+
+_KNOWN_METHODS = frozenset(method.upper() for method in http_methods_list)
+
+
+def requested_fields(environ: dict, param: str = 'fields') -> Optional[Projection]:
+    """Parses the sparse fieldset of the `fields` query parameter, repeated parameters are merged."""
+    query_string = environ.get('QUERY_STRING', '')
+    if f'{param}=' not in query_string:
+        return None
+    from urllib.parse import parse_qs
+    values = parse_qs(query_string).get(param)
+    return parse_fields(','.join(values)) if values else None
+
 
 class RoutesManager:
     __routes: Dict[str, Resource]
-    __dynamic_routes: List[Tuple[re.Pattern, Resource]]
+    __dynamic_routes: List[Tuple[re.Pattern, str, Resource]]
 
     def __init__(self, routes=None):
         self.__routes = routes if routes is not None else {}
@@ -27,20 +71,26 @@ class RoutesManager:
 
     def __iter__(self):
         yield from self.__routes.keys()
-        for pattern, _ in self.__dynamic_routes:
+        for pattern, _, _ in self.__dynamic_routes:
             yield pattern.pattern
 
     @property
     def routes(self) -> Dict[str, Resource]:
         return self.__routes
 
+    def items(self):
+        """Yields (path, resource) for every registered route, static and dynamic."""
+        yield from self.__routes.items()
+        for _, path, resource in self.__dynamic_routes:
+            yield path, resource
+
     def add_route(self, path: str, resource: Resource):
         pattern = compile_path(path)
         if pattern is not None:
-            for existing_pattern, _ in self.__dynamic_routes:
+            for existing_pattern, _, _ in self.__dynamic_routes:
                 if existing_pattern.pattern == pattern.pattern:
                     raise RouteAlreadyExistsError(path)
-            self.__dynamic_routes.append((pattern, resource))
+            self.__dynamic_routes.append((pattern, path, resource))
         else:
             if path in self.__routes:
                 raise RouteAlreadyExistsError(path)
@@ -55,14 +105,19 @@ class RoutesManager:
 
     def match_route(self, path: str) -> Tuple[Resource, Dict[str, str]]:
         """Return (resource, path_params) for the given request path."""
+        _, resource, path_params = self.resolve(path)
+        return resource, path_params
+
+    def resolve(self, path: str) -> Tuple[str, Resource, Dict[str, str]]:
+        """Return (route_template, resource, path_params) for the given request path."""
         # 1. Fast exact-match on static routes
         if path in self.__routes:
-            return self.__routes[path], {}
+            return path, self.__routes[path], {}
         # 2. Linear scan over dynamic routes in registration order
-        for pattern, resource in self.__dynamic_routes:
+        for pattern, route, resource in self.__dynamic_routes:
             match = pattern.fullmatch(path)
             if match:
-                return resource, match.groupdict()
+                return route, resource, match.groupdict()
         raise NotFoundError()
 
 
@@ -71,9 +126,22 @@ class App:
     import_name: str
     default_headers: dict
     is_debug: bool
-    testing_generator: TestGenerator
+    field_projection: bool
+    error_handlers: Dict[Type[Exception], 'ErrorHandler']
     auth_handler: BaseAuthenticator
-    
+    middlewares: List
+    pools: Dict[str, 'Pool']
+    offloader: Optional['ProcessOffloader']
+    gc_policy: Optional['GcPolicy']
+    access_logger: Optional['AccessLogger']
+    metrics: Optional['HttpMetrics']
+    batch: Optional[BatchEndpoint]
+    profiler: Optional['RequestProfiler']
+    slow_request_monitor: Optional['SlowRequestMonitor']
+    memory_tracker: Optional['MemoryTracker']
+    server_timing: Optional['ServerTiming']
+    traffic_capture: Optional['TrafficCapture']
+
     def __init__(
             self,
             import_name: str,
@@ -83,8 +151,21 @@ class App:
             auth_handler=None,
             routes_manager=RoutesManager,
             error_format=DefaultErrorResponse,
-            testing_generator=UnitTestGenerator
-            # TODO: ADICIONAR UM STATUS_CODE_HANDLER DEFAULT POSSIBILITANDO AO USUARIO RETORNAR O STATUS CODE QUE ELE ACHAR MELHOR A DEPENDER DO TIPO DE ERRO
+            testing_generator=None,
+            access_log: Union[bool, str, 'AccessLogger']=True,
+            metrics: Union[bool, 'HttpMetrics']=False,
+            metrics_path: Optional[str]='/metrics',
+            profiler: Optional['RequestProfiler']=None,
+            slow_request_monitor: Optional['SlowRequestMonitor']=None,
+            memory_tracker: Optional['MemoryTracker']=None,
+            server_timing: Union[bool, 'ServerTiming']=False,
+            traffic_capture: Optional['TrafficCapture']=None,
+            field_projection: bool=False,
+            batch: Union[bool, BatchEndpoint]=False,
+            batch_path: str='/batch',
+            offloader: Optional['ProcessOffloader']=None,
+            gc_policy: Optional['GcPolicy']=None,
+            error_handlers: Optional[Dict[Type[Exception], 'ErrorHandler']]=None
     ):
         if default_headers is None:
             default_headers = {}
@@ -99,10 +180,57 @@ class App:
         if not issubclass(error_format, dict):
             raise TypeError('The error format class must be a subclass of dict.')
         self.error_format=error_format
-        self.testing_generator = testing_generator(self)
-        self.__tests_generated = False
+        self.field_projection = field_projection
+        self.__testing_generator_class = testing_generator
+        self.middlewares = []
+        self.pools = {}
+        self.offloader = offloader
+        self.gc_policy = gc_policy
+        self.__startup_hooks: List[Callable[[], Any]] = []
+        self.__shutdown_hooks: List[Callable[[], Any]] = []
+        self.__frozen = False
+        self.__started = False
+        self.__ready = False
+        self.__startup_lock = threading.RLock()
+        self.__lifecycle_registered = False
+        self.__header_items: Dict[int, Tuple[dict, tuple]] = {}
+        self.error_handlers: Dict[Type[Exception], ErrorHandler] = dict(error_handlers or {})
+        self.__compiled_error_handlers: Dict[type, Union[Tuple[int, dict, bytes], Callable]] = {}
+
+        # The default access logger is created by `freeze`, so importing an App doesn't load logging.
+        if isinstance(access_log, str) and access_log != 'json':
+            raise ValueError("access_log must be a bool, 'json' or an AccessLogger.")
+        self.__access_log = access_log
+        self.access_logger = access_log if not isinstance(access_log, (bool, str)) else None
+
+        if metrics is True:
+            from pebarest.metrics.http_metrics import HttpMetrics
+            metrics = HttpMetrics()
+        self.metrics = metrics or None
+        self.metrics_path = metrics_path
+
+        if batch is True:
+            batch = BatchEndpoint()
+        self.batch = batch or None
+        self.batch_path = batch_path
+
+        if server_timing is True:
+            from pebarest.debug.timing import ServerTiming
+            server_timing = ServerTiming()
+        self.server_timing = server_timing or None
+        self.profiler = profiler
+        self.slow_request_monitor = slow_request_monitor
+        self.memory_tracker = memory_tracker
+        self.traffic_capture = traffic_capture
+        dispatch = self._dispatch
+        for debug_hook in (self.server_timing, profiler, slow_request_monitor, traffic_capture, memory_tracker):
+            if debug_hook is not None:
+                dispatch = partial(debug_hook.run, dispatch=dispatch)
+        self.__dispatch = dispatch
 
     def add_route(self, path: str, resource: Union[object, Resource]):
+        if self.__frozen:
+            raise AppFrozenError()
         if isinstance(resource, Resource):
             if not resource.auth_handler:
                 resource.auth_handler = self.auth_handler
@@ -113,11 +241,195 @@ class App:
             resource = Resource.from_anonymous_object(resource, self.headers)
             self.add_route(path, resource)
     
+    def add_middleware(self, middleware):
+        """
+            Adds a middleware that wraps every route, outside the resource level middlewares.
+            Accepts a `Middleware` instance or a callable `(request, call_next) -> Response`.
+        """
+        if self.__frozen:
+            raise AppFrozenError()
+        self.middlewares.append(middleware)
+
+    def add_error_handler(self, exception_type: Type[Exception], handler: 'ErrorHandler'):
+        """
+            Maps an exception type (and its subclasses) raised by the handlers to a response.
+            `handler` is a status code, a (status code, title) tuple, whose body is serialized once
+            with the error format, or a callable `(exception) -> Response`.
+        """
+        if self.__frozen:
+            raise AppFrozenError()
+        self.error_handlers[exception_type] = handler
+
+    def add_pool(self, name: str, pool: 'Pool'):
+        """
+            Registers a pool whose objects handlers acquire with `request.lease(name)`. It's closed on shutdown.
+        """
+        self.pools[name] = pool
+
+    def on_startup(self, hook: Callable[[], Any]) -> Callable[[], Any]:
+        """
+            Registers a function run once per worker process before its first request, usable as a decorator.
+        """
+        self.__startup_hooks.append(hook)
+        return hook
+
+    def on_shutdown(self, hook: Callable[[], Any]) -> Callable[[], Any]:
+        """
+            Registers a function run when the worker process exits, usable as a decorator.
+        """
+        self.__shutdown_hooks.append(hook)
+        return hook
+
+    def startup(self):
+        """
+            Freezes the App and runs the startup hooks. Runs automatically before the first request of
+            every worker process, call it in the worker initialization to fail early instead.
+            Concurrent first requests wait for the one running it.
+        """
+        if self.__ready:
+            return
+        with self.__startup_lock:
+            if self.__ready:
+                return
+            self.freeze()
+            if not self.__started:
+                if not self.__lifecycle_registered:
+                    os.register_at_fork(after_in_child=self.__reset_after_fork)
+                    atexit.register(self.shutdown)
+                    self.__lifecycle_registered = True
+                if self.gc_policy is not None:
+                    self.gc_policy.install()
+                for hook in self.__startup_hooks:
+                    hook()
+                self.__started = True
+            self.__ready = True
+
+    def shutdown(self):
+        """
+            Runs the shutdown hooks in reverse registration order, closes the pools and the offloader and
+            restores the gc settings.
+        """
+        if not self.__started:
+            return
+        self.__started = self.__ready = False
+        for hook in reversed(self.__shutdown_hooks):
+            try:
+                hook()
+            except Exception as e:
+                self.logger.exception(e)
+        for pool in self.pools.values():
+            pool.close()
+        if self.offloader is not None:
+            self.offloader.shutdown()
+        if self.gc_policy is not None:
+            self.gc_policy.uninstall()
+
+    def __reset_after_fork(self):
+        # The child runs its own startup hooks, the lock may have been held by another thread of the parent.
+        self.__started = self.__ready = False
+        self.__startup_lock = threading.RLock()
+
+    def compile_middlewares(self):
+        """
+            Composes the middleware chain of every registered resource once, so requests
+            don't walk the middleware list. Runs automatically before the first request.
+        """
+        for _, resource in self.routes_manager.items():
+            resource.compile_middlewares(self.middlewares, timed=self.server_timing is not None)
+
+    def freeze(self):
+        """
+            Compiles the application into its dispatch plan: builds the lazily created subsystems,
+            composes the middlewares, resolves the handler and body model of every route and method,
+            and pre-encodes the default header lists and the error handler responses.
+            Runs automatically before the first request, after it routes and middlewares can't be added
+            until `unfreeze` is called.
+        """
+        if self.__frozen:
+            return
+        if self.__access_log is True or self.__access_log == 'json':
+            from pebarest.utils.logging import AccessLogger
+            self.__access_log = AccessLogger(f'{self.import_name}.access', is_debug=self.is_debug,
+                                             json_format=self.__access_log == 'json')
+        self.access_logger = self.__access_log or None
+        if self.gc_policy is not None and self.metrics is not None:
+            self.gc_policy.bind_metrics(self.metrics.registry)
+        self.compile_middlewares()
+
+        header_items = {id(self.headers): (self.headers, tuple(self.headers.items()))}
+        for _, resource in self.routes_manager.items():
+            resource.freeze()
+            resource.pools = self.pools
+            if self.offloader is not None and resource.offloader is None:
+                resource.offloader = self.offloader
+            header_items[id(resource.headers)] = (resource.headers, tuple(resource.headers.items()))
+        self.__header_items = header_items
+
+        compiled_error_handlers = {}
+        for exception_type, handler in self.error_handlers.items():
+            if callable(handler):
+                compiled_error_handlers[exception_type] = handler
+                continue
+            status, title = handler if isinstance(handler, tuple) else (handler, None)
+            if title is None:
+                from http import HTTPStatus
+                title = f'{status} {HTTPStatus(status).phrase}'
+            compiled_error_handlers[exception_type] = (status, self.headers, encoded_error(self.error_format, title))
+        self.__compiled_error_handlers = compiled_error_handlers
+        # Routes may have changed since the last freeze.
+        self.__dict__.pop('_generate_openapi_json', None)
+        self.__frozen = True
+
+    def prepare_for_fork(self, collect: bool = True) -> int:
+        """
+            Prepares the App to be shared by the workers of a pre-fork server: call it in the master
+            process once the app is loaded, right before the workers are forked. It freezes the App,
+            builds its lazily created state (logger, OpenAPI document, constant error bodies, status
+            lines), collects the garbage when `collect` is set and calls `gc.freeze()`. The frozen objects
+            are skipped by the collections of the workers, whose writes would otherwise copy the shared
+            pages into every worker. The startup hooks still run in each worker.
+            Returns the number of frozen objects.
+        """
+        self.freeze()
+        self.logger
+        if self.generate_docs:
+            self._generate_openapi_json
+        for title in (NotFoundError.DEFAULT_MESSAGE, 'Unauthorized', 'Service Unavailable', 'Gateway Timeout',
+                      'Internal Server Error'):
+            encoded_error(self.error_format, title)
+        from http import HTTPStatus
+        prepare_status_lines(status.value for status in HTTPStatus)
+        if collect:
+            gc.collect()
+        gc.freeze()
+        return gc.get_freeze_count()
+
+    def unfreeze(self):
+        """
+            Allows adding routes and middlewares again, the plan is rebuilt before the next request.
+        """
+        self.__frozen = self.__ready = False
+
+    @property
+    def frozen(self) -> bool:
+        return self.__frozen
+
+    @CachedProperty
+    def testing_generator(self) -> 'TestGenerator':
+        generator_class = self.__testing_generator_class
+        if generator_class is None:
+            from pebarest.testing.unittest_generator import UnitTestGenerator
+            generator_class = UnitTestGenerator
+        return generator_class(self)
+
     def generate_tests(self, test_cases: Dict[str, Dict[str, any]] = None, output_file=None):
+        """
+        Writes the generated test file. This is an explicit step (see `python -m pebarest.testing`),
+        requests never trigger it.
+        """
         if self.is_debug:
             if self.testing_generator:
                 self.testing_generator.generate(test_cases, output_file)
-                self.__tests_generated = True
 
     @CachedProperty
     def _generate_openapi_json(self) -> Dict[str, Any]:
@@ -169,48 +481,118 @@ class App:
         }
 
     @CachedProperty
-    def logger(self) -> logging.Logger:
+    def logger(self) -> 'logging.Logger':
+        from pebarest.utils.logging import create_logger
         return create_logger(self.import_name, self.is_debug)
 
-    def test_client(self):
+    def test_client(self) -> 'TestClient':
+        from pebarest.testing.test_client import TestClient
         return TestClient(self)
 
-    def __call__(self, environ: dict, start_response=None):
-        if not self.__tests_generated:
-            self.generate_tests()
+    def _dispatch(self, environ: dict) -> Tuple[Optional[str], Response]:
+        """
+        Routes the request and returns (route_template, response), mapping errors to responses.
+        """
+        path = environ.get('PATH_INFO', '/')
+        route = None
         try:
-            path = environ.get('PATH_INFO', '/')
-
             if self.generate_docs and path == '/docs':
-                openapi_data = self._generate_openapi_json
-                response = Response(200, self.headers, openapi_data)
-                if start_response:
-                    start_response(response.get_status(), list(response.headers.items()))
-                return response.get_body_bytes()
-
-            resource, path_params = self.routes_manager.match_route(path)
-            response = resource(environ, path_params)
-        except MethodNotAllowedError as e:
-            response = Response(405, self.headers, self.error_format(e.title, method=e.method))
-        except NotFoundError as e:
-            response = Response(e.status_code, self.headers, self.error_format(e.message))
-        except AttrMissingError as e:
-            response = Response(422, self.headers, self.error_format.attr_missing_error(e))
-        except AttrTypeError as e:
-            response = Response(422, self.headers, self.error_format.attr_type_error(e))
+                route = path
+                response = Response(200, self.headers, self._generate_openapi_json)
+            elif self.metrics is not None and path == self.metrics_path:
+                route = path
+                response = Response(200, {'Content-Type': self.metrics.content_type}, self.metrics.render())
+            elif self.batch is not None and path == self.batch_path:
+                route = path
+                response = self.batch(self, environ)
+            else:
+                route, resource, path_params = self.routes_manager.resolve(path)
+                fields = requested_fields(environ) if self.field_projection else None
+                if fields is not None:
+                    # Middlewares serializing the response (e.g. Idempotency) apply it too.
+                    environ[FIELDS_ENVIRON_KEY] = fields
+                response = resource(environ, path_params)
+                if fields is not None and response.fields is None and response.status < 400:
+                    response = response.with_fields(fields)
         except Exception as e:
-            self.logger.exception(e)
-            response = Response(500, self.headers, self.error_format('Internal Server Error'))
-
-        if response.status < 200:
-            self.logger.info(str(response.body))
-        elif 300 <= response.status < 400:
-            self.logger.warning(str(response.body))
-        elif 400 <= response.status < 500:
-            self.logger.error(str(response.body))
-        elif response.status >= 500:
-            self.logger.critical(str(response.body))
-
-        if start_response is not None:
-            start_response(response.get_status(), list(response.headers.items()))
-        return response.get_body_bytes()
+            response = self._error_response(e)
+        return route, response
+
+    def _error_response(self, e: Exception) -> Response:
+        """
+        Maps an exception raised while handling a request to its error response. The constant bodies
+        are serialized once per error format class.
+        """
+        if self.__compiled_error_handlers:
+            for exception_type in type(e).__mro__:
+                handler = self.__compiled_error_handlers.get(exception_type)
+                if handler is not None:
+                    return Response(*handler) if type(handler) is tuple else handler(e)
+        if isinstance(e, MethodNotAllowedError):
+            if e.method in _KNOWN_METHODS:
+                return Response(405, self.headers, encoded_error(self.error_format, e.title, method=e.method))
+            return Response(405, self.headers, self.error_format(e.title, method=e.method))
+        if isinstance(e, NotFoundError):
+            if e.message == NotFoundError.DEFAULT_MESSAGE:
+                return Response(e.status_code, self.headers, encoded_error(self.error_format, e.message))
+            return Response(e.status_code, self.headers, self.error_format(e.message))
+        if isinstance(e, AttrMissingError):
+            return Response(422, self.headers, self.error_format.attr_missing_error(e))
+        if isinstance(e, AttrTypeError):
+            return Response(422, self.headers, self.error_format.attr_type_error(e))
+        if isinstance(e, HttpError):
+            return Response(e.status_code, self.headers, self.error_format(e.message))
+        if isinstance(e, UnauthorizedError):
+            return Response(401, self.headers, encoded_error(self.error_format, 'Unauthorized'))
+        if isinstance(e, PoolTimeoutError):
+            return Response(503, self.headers, encoded_error(self.error_format, 'Service Unavailable'))
+        if isinstance(e, OffloadTimeoutError):
+            return Response(504, self.headers, encoded_error(self.error_format, 'Gateway Timeout'))
+        self.logger.exception(e)
+        return Response(500, self.headers, encoded_error(self.error_format, 'Internal Server Error'))
+
+    def __call__(self, environ: dict, start_response=None):
+        if not self.__ready:
+            self.startup()
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.in_flight.inc()
+        gc_policy = self.gc_policy
+        if gc_policy is not None:
+            gc_policy.request_started()
+        try:
+            started = perf_counter()
+            route, response = self.__dispatch(environ)
+
+            try:
+                body = response.stream(environ) if response.streamed else response.get_body_bytes()
+            except Exception as e:
+                self.logger.exception(e)
+                response = Response(500, self.headers, encoded_error(self.error_format, 'Internal Server Error'))
+                body = response.get_body_bytes()
+
+            if self.access_logger is not None or metrics is not None:
+                duration = perf_counter() - started
+                if response.streamed:
+                    size = int(response.headers.get('Content-Length') or 0)
+                else:
+                    size = sum(len(chunk) for chunk in body)
+                method = environ.get('REQUEST_METHOD')
+                if self.access_logger is not None:
+                    self.access_logger.log(method, route or environ.get('PATH_INFO', '/'), response.status, duration,
+                                           size)
+                if metrics is not None:
+                    metrics.observe(route, method, response.status, duration, content_length(environ), size)
+
+            if start_response is not None:
+                headers = response.headers
+                # Servers may append to the list (e.g. Date), so the pre-encoded tuple is copied.
+                items = self.__header_items.get(id(headers))
+                start_response(response.get_status(),
+                               list(items[1]) if items is not None and items[0] is headers else list(headers.items()))
+            return body
+        finally:
+            if gc_policy is not None:
+                gc_policy.request_finished()
+            if metrics is not None:
+                metrics.in_flight.dec()
@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+
+from typing import List, Tuple, TYPE_CHECKING
+
+from pebarest.exceptions import MethodNotAllowedError
+from pebarest.models.response import Response
+from pebarest.utils.json import dumps, parse_fields
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+
+class BatchEndpoint:
+    """
+    Executes a list of sub-requests in one HTTP round trip. The endpoint receives a JSON list (or an
+    object with a "requests" list) of {"method": "GET", "path": "/users/1", "headers": {...}, "body": {...}}
+    entries and answers a JSON list of {"status", "headers", "body"} in the same order.
+
+    Sub-requests are routed with the App routes manager and call the resources directly, without
+    building a WSGI environ. Each one is isolated: its errors become its own error response.
+    With `workers` > 1 they run concurrently in a thread pool shared by the batches.
+    """
+    max_requests: int
+    workers: int
+
+    def __init__(self, max_requests: int = 50, workers: int = 1):
+        if max_requests < 1 or workers < 1:
+            raise ValueError('max_requests and workers must be positive.')
+        self.max_requests = max_requests
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset_after_fork(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> 'ThreadPoolExecutor':
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # concurrent.futures imports logging, keep it off the import path.
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='pebarest-batch')
+        return self._executor
+
+    def __call__(self, app, environ: dict) -> Response:
+        if environ.get('REQUEST_METHOD') != 'POST':
+            raise MethodNotAllowedError(environ.get('REQUEST_METHOD', 'GET'))
+        try:
+            entries = self._read_entries(environ)
+        except ValueError as e:
+            return Response(400, app.headers, app.error_format(str(e)))
+        if len(entries) > self.max_requests:
+            return Response(413, app.headers, app.error_format(f'A batch accepts up to {self.max_requests} requests.'))
+
+        if self.workers > 1 and len(entries) > 1:
+            results = list(self.executor.map(lambda entry: self.execute(app, entry), entries))
+        else:
+            results = [self.execute(app, entry) for entry in entries]
+
+        body = b'[' + b', '.join(self._encode(app, response) for response in results) + b']'
+        return Response(200, app.headers, body)
+
+    @staticmethod
+    def _read_entries(environ: dict) -> List[dict]:
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            data = json.loads(environ['wsgi.input'].read(length).decode('utf-8')) if length > 0 else None
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ValueError('The batch body must be a JSON list of requests.')
+        if isinstance(data, dict):
+            data = data.get('requests')
+        if not isinstance(data, list) or not all(isinstance(entry, dict) and 'path' in entry for entry in data):
+            raise ValueError('The batch body must be a JSON list of requests.')
+        return data
+
+    @staticmethod
+    def _split_path(path: str) -> Tuple[str, dict]:
+        path, _, query_string = path.partition('?')
+        if not query_string:
+            return path, {}
+        from urllib.parse import parse_qs
+        return path, {key: value[0] if len(value) == 1 else value for key, value in parse_qs(query_string).items()}
+
+    def execute(self, app, entry: dict) -> Response:
+        """Dispatches one sub-request, mapping its errors to an error response."""
+        try:
+            path, params = self._split_path(entry['path'])
+            _, resource, path_params = app.routes_manager.resolve(path)
+            fields = None
+            if app.field_projection and 'fields' in params:
+                fields = params['fields']
+                fields = parse_fields(fields if isinstance(fields, str) else ','.join(fields))
+            response = resource.dispatch(str(entry.get('method', 'GET')).upper(), path_params,
+                                         entry.get('headers'), entry.get('body'), params, fields)
+            if fields is not None and response.fields is None and response.status < 400:
+                response = response.with_fields(fields)
+        except Exception as e:
+            response = app._error_response(e)
+        return response
+
+    @staticmethod
+    def _encode(app, response: Response) -> bytes:
+        if response.streamed:
+            # Event streams never end and file bodies would be read whole in memory: release the source.
+            close = getattr(response.body, 'close', None)
+            if close is not None:
+                close()
+            response = Response(501, app.headers,
+                                app.error_format('Streamed responses are not supported in a batch.'))
+        try:
+            body = response.get_body_bytes()[0]
+        except Exception as e:
+            response = app._error_response(e)
+            body = response.get_body_bytes()[0]
+        if isinstance(response.body, bytes):
+            # Bytes bodies are embedded as they are when they hold JSON, as strings otherwise.
+            try:
+                json.loads(body)
+            except ValueError:
+                body = json.dumps(body.decode('utf-8', 'replace')).encode('utf-8')
+        return (b'{"status": ' + str(response.status).encode() + b', "headers": ' + dumps(response.headers)
+                + b', "body": ' + body + b'}')
+
+
+__all__ = ['BatchEndpoint']
@@ -1,2 +1,17 @@
 from .base_authenticator import BaseAuthenticator
 from .api_key import APIKeyAuthenticator
+
+_LAZY_ATTRIBUTES = {
+    'HashedKeyStore': 'pebarest.auth.key_store',
+    'KeyStoreAuthenticator': 'pebarest.auth.key_store',
+    'hash_key': 'pebarest.auth.key_store',
+}
+
+
+def __getattr__(name):
+    # The key store is only imported when used.
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'pebarest.auth' has no attribute '{name}'")
+    import importlib
+    return getattr(importlib.import_module(module_name), name)
@@ -0,0 +1,258 @@
+import hashlib
+import logging
+import os
+import threading
+
+from array import array
+from time import monotonic
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pebarest.auth.base_authenticator import BaseAuthenticator
+from pebarest.exceptions.app_exeptions import UnauthorizedError
+
+
+logger = logging.getLogger('pebarest.key_store')
+
+DIGEST_SIZE = 16
+_EMPTY = bytes(DIGEST_SIZE)
+_LOAD_FACTOR = 0.75
+
+
+def hash_key(key: str, secret: bytes = b'') -> bytes:
+    """Fixed-width digest of an API key, keyed by the store `secret`."""
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=DIGEST_SIZE, key=secret).digest()
+
+
+class _BloomFilter:
+    __slots__ = ('bits', 'size', 'hashes')
+
+    def __init__(self, count: int, bits_per_key: int):
+        self.size = max(64, count * bits_per_key)
+        self.hashes = max(1, round(bits_per_key * 0.69))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def __positions(self, digest: bytes):
+        # Double hashing over two independent halves of the digest.
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return ((first + i * second) % size for i in range(self.hashes))
+
+    def add(self, digest: bytes):
+        bits = self.bits
+        for position in self.__positions(digest):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self.__positions(digest))
+
+
+class _KeyTable:
+    """
+        Open-addressing table of key digests, stored side by side in one bytes object, with the index
+        of their client id in a parallel array. Lookups probe linearly from the digest slot.
+    """
+    __slots__ = ('digests', 'client_indexes', 'client_ids', 'capacity', 'count', 'bloom')
+
+    def __init__(self, entries: Iterable[Tuple[bytes, Any]], bloom_bits_per_key: int = 0):
+        entries = list(entries)
+        self.capacity = capacity = int(len(entries) / _LOAD_FACTOR) + 1
+        digests = bytearray(capacity * DIGEST_SIZE)
+        client_indexes = array('I', bytes(4 * capacity))
+        client_ids: List[Any] = []
+        client_positions: Dict[Any, int] = {}
+        self.bloom = _BloomFilter(len(entries), bloom_bits_per_key) if bloom_bits_per_key else None
+        count = 0
+        for digest, client_id in entries:
+            if digest == _EMPTY:
+                continue
+            slot = int.from_bytes(digest[:8], 'little') % capacity
+            while True:
+                offset = slot * DIGEST_SIZE
+                current = digests[offset:offset + DIGEST_SIZE]
+                if current == _EMPTY:
+                    count += 1
+                    break
+                if current == digest:
+                    break
+                slot = (slot + 1) % capacity
+            digests[offset:offset + DIGEST_SIZE] = digest
+            position = client_positions.get(client_id)
+            if position is None:
+                position = client_positions[client_id] = len(client_ids)
+                client_ids.append(client_id)
+            client_indexes[slot] = position
+            if self.bloom is not None:
+                self.bloom.add(digest)
+        self.digests = bytes(digests)
+        self.client_indexes = client_indexes
+        self.client_ids = client_ids
+        self.count = count
+
+    def get(self, digest: bytes) -> Optional[Any]:
+        if self.bloom is not None and digest not in self.bloom:
+            return None
+        digests, capacity = self.digests, self.capacity
+        slot = int.from_bytes(digest[:8], 'little') % capacity
+        while True:
+            offset = slot * DIGEST_SIZE
+            current = digests[offset:offset + DIGEST_SIZE]
+            if current == digest:
+                return self.client_ids[self.client_indexes[slot]]
+            if current == _EMPTY:
+                return None
+            slot = (slot + 1) % capacity
+
+    @property
+    def memory(self) -> int:
+        """Approximate bytes used by the digests and the client id indexes."""
+        bloom = len(self.bloom.bits) if self.bloom is not None else 0
+        return len(self.digests) + self.client_indexes.itemsize * len(self.client_indexes) + bloom
+
+
+class HashedKeyStore:
+    """
+        API keys to client ids mapping that keeps only fixed-width digests of the keys, in a compact
+        open-addressing table, instead of the plaintext keys in a dict.
+
+        The keys are loaded from `path`, one `key,client_id` per line (`#` comments and blank lines are
+        skipped). With `hashed=True` the first column is the hex digest from `hash_key`, so the plaintext
+        keys are never written on disk. When `check_interval` is set the file is checked for changes that
+        often and reloaded in a background thread: lookups keep using the previous table until the new
+        one is built and swapped in. Without a `path` there's no file to check, the keys are set with
+        `replace`.
+
+        `bloom_bits_per_key` adds a bloom filter that rejects most unknown keys before the table probe.
+    """
+    path: Optional[str]
+    hashed: bool
+    check_interval: Optional[float]
+
+    def __init__(self, path: Optional[str] = None, secret: bytes = b'', hashed: bool = False,
+                 check_interval: Optional[float] = 5.0, bloom_bits_per_key: int = 0):
+        self.path = path
+        self.secret = secret
+        self.hashed = hashed
+        self.check_interval = check_interval if path is not None else None
+        self.bloom_bits_per_key = bloom_bits_per_key
+        self._table = _KeyTable((), bloom_bits_per_key)
+        self._file_version: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._reload_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+        if path is not None:
+            self.reload()
+
+    def _reset_after_fork(self):
+        # A reload thread of the parent doesn't exist in the child, its lock would stay held.
+        self._reload_lock = threading.Lock()
+
+    @classmethod
+    def from_keys(cls, keys: Dict[str, Any], secret: bytes = b'', bloom_bits_per_key: int = 0) -> 'HashedKeyStore':
+        store = cls(secret=secret, check_interval=None, bloom_bits_per_key=bloom_bits_per_key)
+        store.replace((hash_key(key, secret), client_id) for key, client_id in keys.items())
+        return store
+
+    def __len__(self) -> int:
+        return self._table.count
+
+    @property
+    def memory(self) -> int:
+        return self._table.memory
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the client id of the key, or None when the key is unknown."""
+        if self.check_interval is not None and monotonic() >= self._next_check:
+            self.__check_file()
+        return self._table.get(hash_key(key, self.secret))
+
+    def replace(self, entries: Iterable[Tuple[bytes, Any]]):
+        """Builds a table from (digest, client id) pairs and swaps it in."""
+        self._table = _KeyTable(entries, self.bloom_bits_per_key)
+
+    def reload(self) -> bool:
+        """Reloads the keys file when it changed, returns whether it was reloaded."""
+        if self.path is None:
+            return False
+        with self._reload_lock:
+            return self.__reload()
+
+    def __reload(self) -> bool:
+        stat_result = os.stat(self.path)
+        version = (stat_result.st_mtime_ns, stat_result.st_size)
+        if version == self._file_version:
+            return False
+        # Set first, so an invalid file is reported once instead of on every check.
+        self._file_version = version
+        with open(self.path, encoding='utf-8') as keys_file:
+            self.replace(self.__parse(keys_file))
+        return True
+
+    def __parse(self, lines: Iterable[str]) -> Iterable[Tuple[bytes, Any]]:
+        for number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            key, separator, client_id = line.partition(',')
+            if not separator:
+                raise ValueError(f'{self.path}:{number}: expected a key,client_id line.')
+            key, client_id = key.strip(), client_id.strip()
+            if not self.hashed:
+                yield hash_key(key, self.secret), client_id
+                continue
+            try:
+                digest = bytes.fromhex(key)
+            except ValueError:
+                digest = b''
+            if len(digest) != DIGEST_SIZE:
+                raise ValueError(f'{self.path}:{number}: expected a {DIGEST_SIZE} bytes hex digest.')
+            yield digest, client_id
+
+    def __check_file(self):
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        self._next_check = monotonic() + self.check_interval
+        try:
+            threading.Thread(target=self.__background_reload, name='pebarest-key-reload', daemon=True).start()
+        except BaseException:
+            self._reload_lock.release()
+            raise
+
+    def __background_reload(self):
+        try:
+            if self.__reload():
+                logger.info('Reloaded %d API keys from %s', len(self), self.path)
+        except Exception:
+            # The previous keys stay in use until the file is valid again.
+            logger.exception('Could not reload the API keys from %s', self.path)
+        finally:
+            self._reload_lock.release()
+
+
+class KeyStoreAuthenticator(BaseAuthenticator):
+    """
+        API key authenticator backed by a `HashedKeyStore`.
+    """
+    def __init__(self, store: HashedKeyStore, header_name: str = "X-API-Key", query_param: Optional[str] = None):
+        self.store = store
+        # The request headers are title-cased.
+        self.header_name = header_name.title()
+        self.query_param = query_param
+
+    def authenticate(self, request) -> Optional[Dict[str, Any]]:
+        token = request.headers.get(self.header_name)
+
+        if not token and self.query_param:
+            token = request.params.get(self.query_param)
+
+        client_id = self.store.get(token) if token else None
+        if client_id is None:
+            raise UnauthorizedError()
+        return {
+            "client_id": client_id,
+            "auth_method": "API-Key"
+        }
+
+
+__all__ = ['HashedKeyStore', 'KeyStoreAuthenticator', 'hash_key']
@@ -0,0 +1 @@
+from .runner import Benchmark, benchmark, run_benchmarks, compare, select_benchmarks
@@ -0,0 +1,55 @@
+"""
+Runs the PebaREST benchmarks.
+
+    python -m pebarest.benchmarks --output results.json
+    python -m pebarest.benchmarks --baseline results.json --threshold 0.1
+
+With --baseline the exit status is 1 when any case is slower than the baseline by more than the threshold.
+"""
+import argparse
+import sys
+
+from pebarest.benchmarks import cases  # noqa: F401 (registers the benchmark cases)
+from pebarest.benchmarks.runner import compare, load_results, run_benchmarks, save_results, select_benchmarks
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pebarest.benchmarks', description='Runs the PebaREST benchmarks.')
+    parser.add_argument('-k', '--filter', action='append', help='Only run the cases whose name contains this text.')
+    parser.add_argument('-g', '--group', action='append', choices=['micro', 'macro'], help='Only run this group.')
+    parser.add_argument('-o', '--output', help="Where to write the JSON results ('-' for stdout).")
+    parser.add_argument('-b', '--baseline', help='JSON results to compare against.')
+    parser.add_argument('-t', '--threshold', type=float, default=0.1,
+                        help='Relative slowdown that counts as a regression (default: 0.1).')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Measurements per case (default: 5).')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds per measurement (default: 0.2).')
+    parser.add_argument('-l', '--list', action='store_true', help='List the cases and exit.')
+    args = parser.parse_args(argv)
+
+    selected = select_benchmarks(args.filter, args.group)
+    if args.list:
+        for case in selected:
+            print(f'{case.group:<6} {case.name}')
+        return 0
+
+    def progress(name, result):
+        print(f"{name:<32}{result['median_ns'] / 1000:>12.2f} us{result['ops_per_sec']:>14.1f} ops/s", file=sys.stderr)
+
+    results = run_benchmarks(selected, repeat=args.repeat, min_time=args.min_time, progress=progress)
+    if args.output:
+        save_results(results, args.output)
+
+    if not args.baseline:
+        return 0
+
+    regressions = 0
+    print(f"\n{'case':<32}{'baseline':>12}{'current':>12}{'change':>10}", file=sys.stderr)
+    for name, previous, current, change, regressed in compare(results, load_results(args.baseline), args.threshold):
+        regressions += regressed
+        flag = '  REGRESSION' if regressed else ''
+        print(f'{name:<32}{previous / 1000:>10.2f}us{current / 1000:>10.2f}us{change:>+10.1%}{flag}', file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Measures the memory allocated per request with tracemalloc, on the 200 and on the 404 paths.
+
+    python -m pebarest.benchmarks.allocations
+    python -m pebarest.benchmarks.allocations -n 2000 -o allocations.json
+
+Requests are sent straight to the WSGI callable, three figures are recorded per request, all relative
+to the memory in use before it:
+    peak_bytes: peak of the traced memory during the whole request, usually reached while serializing.
+    handler_bytes: memory in use when the handler runs (the Request, its headers and the call frames).
+    response_bytes: memory held by the dispatched response before serialization (the Response and its body).
+"""
+import argparse
+import io
+import json
+import statistics
+import sys
+import tracemalloc
+
+from typing import Dict
+
+from pebarest.api.app import App
+from pebarest.models import Resource, Request
+
+
+_handler_memory = []
+
+
+class _ItemResource(Resource):
+    def get(self, request: Request):
+        if tracemalloc.is_tracing():
+            _handler_memory.append(tracemalloc.get_traced_memory()[0])
+        return {"id": request.path_params['item_id'], "name": "Peba"}
+
+
+def build_app() -> App:
+    app = App('allocations', default_headers={'Content-Type': 'application/json'}, is_debug=False, access_log=False)
+    app.add_route('/items/{item_id}', _ItemResource())
+    app.freeze()
+    return app
+
+
+def _environ(path: str) -> Dict[str, object]:
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'CONTENT_LENGTH': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'HTTP_ACCEPT': 'application/json',
+        'HTTP_USER_AGENT': 'pebarest-allocations',
+        'wsgi.input': io.BytesIO(b''),
+    }
+
+
+def _start_response(status, headers, exc_info=None):
+    return None
+
+
+def measure(app: App, path: str, requests: int = 1000) -> Dict[str, object]:
+    """Returns the median bytes allocated by a request to `path`."""
+    environ = _environ(path)
+    for _ in range(50):
+        app(dict(environ), _start_response)
+
+    peaks, handler, response = [], [], []
+    _handler_memory.clear()
+    tracemalloc.start()
+    try:
+        for _ in range(requests):
+            request_environ = dict(environ)
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            app(request_environ, _start_response)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+            if _handler_memory:
+                handler.append(_handler_memory.pop() - current)
+
+            request_environ = dict(environ)
+            current, _ = tracemalloc.get_traced_memory()
+            dispatched = app._dispatch(request_environ)
+            response.append(tracemalloc.get_traced_memory()[0] - current)
+            del dispatched
+            _handler_memory.clear()
+    finally:
+        tracemalloc.stop()
+    return {
+        "path": path,
+        "requests": requests,
+        "peak_bytes": int(statistics.median(peaks)),
+        "handler_bytes": int(statistics.median(handler)) if handler else None,
+        "response_bytes": int(statistics.median(response)),
+    }
+
+
+def run(requests: int = 1000) -> Dict[str, Dict[str, object]]:
+    app = build_app()
+    return {
+        "200": measure(app, '/items/42', requests),
+        "404": measure(app, '/missing', requests),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pebarest.benchmarks.allocations',
+                                     description='Measures the memory allocated per request.')
+    parser.add_argument('-n', '--requests', type=int, default=1000, help='Measured requests per path.')
+    parser.add_argument('-o', '--output', help="Where to write the JSON results ('-' for stdout).")
+    args = parser.parse_args(argv)
+
+    results = run(args.requests)
+    for status, result in results.items():
+        print(f"{status} {result['path']:<12} peak {result['peak_bytes']:>6} B  handler {result['handler_bytes']} B  "
+              f"response {result['response_bytes']} B", file=sys.stderr)
+
+    if args.output:
+        data = json.dumps(results, indent=2)
+        if args.output == '-':
+            sys.stdout.write(data + '\n')
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(data + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import random
+
+from datetime import datetime
+from typing import List, Optional
+
+from pebarest.api.app import App, RoutesManager
+from pebarest.cache import MemoryCache
+from pebarest.cache.shared_memory_cache import SharedMemoryCache
+from pebarest.benchmarks.runner import benchmark
+from pebarest.middleware import Middleware
+from pebarest.models import BaseModel, Resource, Request
+from pebarest.utils.json import dumps, parse_fields, to_serializable
+
+
+ROUTES_AT_SCALE = 1000
+LARGE_LIST_SIZE = 10000
+
+
+class _EmptyResource(Resource):
+    def get(self, request: Request):
+        return {}
+
+
+class Address(BaseModel):
+    street: str
+    number: int
+    city: str
+
+
+class FlatUser(BaseModel):
+    id: int
+    name: str
+    email: str
+    active: bool
+    score: float
+
+
+class NestedUser(BaseModel):
+    id: int
+    name: str
+    tags: List[str]
+    address: Address
+    manager: Optional[FlatUser]
+
+
+def _flat_user_payload(index: int = 1) -> dict:
+    return {"id": index, "name": f"User {index}", "email": f"user{index}@peba.dev", "active": True, "score": 9.5}
+
+
+def _nested_user_payload(index: int = 1) -> dict:
+    return {
+        "id": index,
+        "name": f"User {index}",
+        "tags": ["admin", "beta", "peba"],
+        "address": {"street": "Rua das Pebas", "number": index, "city": "Natal"},
+        "manager": _flat_user_payload(index + 1),
+    }
+
+
+def _routes_manager(dynamic: bool) -> RoutesManager:
+    manager = RoutesManager()
+    resource = _EmptyResource()
+    for index in range(ROUTES_AT_SCALE):
+        path = f'/r{index}/items/{{item_id}}' if dynamic else f'/r{index}/items'
+        manager.add_route(path, resource)
+    return manager
+
+
+# --- Routing ----------------------------------------------------------------
+
+@benchmark('routing.static.first')
+def routing_static_first():
+    manager = _routes_manager(dynamic=False)
+    return lambda: manager.match_route('/r0/items')
+
+
+@benchmark('routing.static.last')
+def routing_static_last():
+    manager = _routes_manager(dynamic=False)
+    path = f'/r{ROUTES_AT_SCALE - 1}/items'
+    return lambda: manager.match_route(path)
+
+
+@benchmark('routing.dynamic.first')
+def routing_dynamic_first():
+    manager = _routes_manager(dynamic=True)
+    return lambda: manager.match_route('/r0/items/42')
+
+
+@benchmark('routing.dynamic.last')
+def routing_dynamic_last():
+    manager = _routes_manager(dynamic=True)
+    path = f'/r{ROUTES_AT_SCALE - 1}/items/42'
+    return lambda: manager.match_route(path)
+
+
+# --- Validation -------------------------------------------------------------
+
+@benchmark('validation.flat')
+def validation_flat():
+    payload = _flat_user_payload()
+    return lambda: FlatUser(**payload)
+
+
+@benchmark('validation.nested')
+def validation_nested():
+    payload = _nested_user_payload()
+    return lambda: NestedUser(**payload)
+
+
+# --- Serialization ----------------------------------------------------------
+
+@benchmark('serialization.dict')
+def serialization_dict():
+    payload = _nested_user_payload()
+    return lambda: dumps(payload)
+
+
+@benchmark('serialization.large_list')
+def serialization_large_list():
+    rng = random.Random(1)
+    payload = [
+        {"id": index, "value": rng.random(), "label": f"item-{index}", "created": datetime(2024, 1, 1)}
+        for index in range(LARGE_LIST_SIZE)
+    ]
+    return lambda: to_serializable(payload)
+
+
+@benchmark('serialization.models')
+def serialization_models():
+    users = [NestedUser(**_nested_user_payload(index)) for index in range(1000)]
+    return lambda: dumps(users)
+
+
+@benchmark('serialization.models_projected')
+def serialization_models_projected():
+    users = [NestedUser(**_nested_user_payload(index)) for index in range(1000)]
+    projection = parse_fields('id,name,address.city')
+    return lambda: dumps(users, projection)
+
+
+# --- Caches -----------------------------------------------------------------
+
+@benchmark('cache.memory_get')
+def cache_memory_get():
+    cache = MemoryCache()
+    cache.set('users:1', b'{"id": 1, "name": "Peba"}')
+    return lambda: cache.get('users:1')
+
+
+@benchmark('cache.shared_memory_get')
+def cache_shared_memory_get():
+    cache = SharedMemoryCache(max_bytes=1024 * 1024)
+    cache.set('users:1', b'{"id": 1, "name": "Peba"}')
+    return lambda: cache.get('users:1')
+
+
+# --- End to end -------------------------------------------------------------
+
+class _UsersResource(Resource):
+    def get(self, request: Request):
+        return {"id": request.path_params.get("user_id"), "name": "Peba"}
+
+    def post(self, request: Request[NestedUser]):
+        return {"id": request.body.id}, 201
+
+
+class _ListResource(Resource):
+    def __init__(self, default_headers=None):
+        super().__init__(default_headers)
+        self.items = [_flat_user_payload(index) for index in range(1000)]
+
+    def get(self, request: Request):
+        return self.items
+
+
+class _NoopMiddleware(Middleware):
+    def around(self, request, call_next):
+        return call_next(request)
+
+
+def _app(middlewares: int = 0) -> App:
+    app = App('pebarest.benchmarks', default_headers={'Content-Type': 'application/json'},
+              is_debug=False, access_log=False)
+    for _ in range(middlewares):
+        app.add_middleware(_NoopMiddleware())
+    for index in range(100):
+        app.add_route(f'/static{index}', _EmptyResource())
+        app.add_route(f'/dynamic{index}/{{user_id}}', _UsersResource())
+    app.add_route('/users/{user_id}', _UsersResource())
+    app.add_route('/users', _UsersResource())
+    app.add_route('/list', _ListResource())
+    return app
+
+
+@benchmark('app.get_static', 'macro')
+def app_get_static():
+    client = _app().test_client()
+    return lambda: client.get('/static50')
+
+
+@benchmark('app.get_dynamic', 'macro')
+def app_get_dynamic():
+    client = _app().test_client()
+    return lambda: client.get('/users/42')
+
+
+@benchmark('app.post_nested_model', 'macro')
+def app_post_nested_model():
+    client = _app().test_client()
+    payload = _nested_user_payload()
+    return lambda: client.post('/users', json=payload)
+
+
+@benchmark('app.get_large_list', 'macro')
+def app_get_large_list():
+    client = _app().test_client()
+    return lambda: client.get('/list')
+
+
+@benchmark('app.not_found', 'macro')
+def app_not_found():
+    client = _app().test_client()
+    return lambda: client.get('/wp-login.php')
+
+
+@benchmark('app.middlewares_10', 'macro')
+def app_middlewares():
+    client = _app(middlewares=10).test_client()
+    return lambda: client.get('/users/42')
@@ -0,0 +1,136 @@
+"""
+Measures the effect of a GcPolicy on the tail latency of the requests.
+
+    python -m pebarest.benchmarks.gc_latency
+    python -m pebarest.benchmarks.gc_latency --heap 2000000 -n 20000 -o gc_latency.json
+
+The worker holds `heap` long lived objects, as the data and modules of a large app do, which every full
+collection walks. Each request allocates small dicts, some kept for a while in a bounded cache so they
+reach the old generation. Requests are sent straight to the WSGI callable in bursts separated by short
+idle pauses, first with the default gc settings and then with the policy, and their latencies compared.
+"""
+import argparse
+import gc
+import io
+import json
+import sys
+import time
+
+from collections import deque
+from time import perf_counter_ns
+from typing import Dict, Optional
+
+from pebarest.api.app import App
+from pebarest.benchmarks.histogram import LatencyHistogram
+from pebarest.models import Resource, Request
+from pebarest.utils.gc_policy import GcPolicy
+
+
+class _OrdersResource(Resource):
+    recent = deque(maxlen=20000)
+
+    def get(self, request: Request):
+        orders = [{'id': i, 'lines': [{'sku': f'sku-{j}', 'quantity': j} for j in range(5)]} for i in range(40)]
+        self.recent.append(orders[:5])
+        return {'orders': orders[:3], 'count': len(orders)}
+
+
+def build_app(gc_policy: Optional[GcPolicy] = None) -> App:
+    app = App('gc_latency', default_headers={'Content-Type': 'application/json'}, is_debug=False,
+              access_log=False, gc_policy=gc_policy)
+    app.add_route('/orders', _OrdersResource())
+    return app
+
+
+def _environ() -> Dict[str, object]:
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': '/orders',
+        'QUERY_STRING': '',
+        'CONTENT_LENGTH': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'wsgi.input': io.BytesIO(b''),
+    }
+
+
+def _start_response(status, headers, exc_info=None):
+    return None
+
+
+def measure(app: App, requests: int, burst: int, idle: float) -> Dict[str, object]:
+    """Returns the latency percentiles in microseconds of `requests` requests sent in bursts."""
+    environ = _environ()
+    for _ in range(200):
+        app(dict(environ), _start_response)
+    _OrdersResource.recent.clear()
+    gc.collect()
+
+    histogram = LatencyHistogram()
+    collections_before = [stats['collections'] for stats in gc.get_stats()]
+    for index in range(requests):
+        request_environ = dict(environ)
+        started = perf_counter_ns()
+        app(request_environ, _start_response)
+        histogram.record((perf_counter_ns() - started) // 1000)
+        if idle and (index + 1) % burst == 0:
+            time.sleep(idle)
+    collections = [stats['collections'] - before for stats, before in zip(gc.get_stats(), collections_before)]
+    result = {
+        'requests': requests,
+        'mean_us': round(histogram.mean, 1),
+        'max_us': histogram.max,
+        'collections': collections,
+    }
+    result.update({f'{name}_us': value for name, value in histogram.percentiles((50, 90, 99, 99.9)).items()})
+    return result
+
+
+def run(heap: int = 1_000_000, requests: int = 10000, burst: int = 100, idle: float = 0.02,
+        policy: Optional[GcPolicy] = None) -> Dict[str, object]:
+    retained = [{'id': i} for i in range(heap)]
+    try:
+        default = measure(build_app(), requests, burst, idle)
+        policy = policy or GcPolicy(idle_delay=idle / 4 if idle else None)
+        app = build_app(policy)
+        try:
+            with_policy = measure(app, requests, burst, idle)
+            with_policy['pauses'] = policy.report()['generations']
+        finally:
+            app.shutdown()
+    finally:
+        del retained
+    return {'heap': heap, 'burst': burst, 'idle_s': idle, 'default': default, 'policy': with_policy}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pebarest.benchmarks.gc_latency',
+                                     description='Compares the tail latency with and without a GcPolicy.')
+    parser.add_argument('--heap', type=int, default=1_000_000, help='Long lived objects held by the worker.')
+    parser.add_argument('-n', '--requests', type=int, default=10000, help='Measured requests per run.')
+    parser.add_argument('--burst', type=int, default=100, help='Requests between two idle pauses.')
+    parser.add_argument('--idle', type=float, default=0.02, help='Idle pause in seconds (0 for constant load).')
+    parser.add_argument('-o', '--output', help="Where to write the JSON results ('-' for stdout).")
+    args = parser.parse_args(argv)
+
+    results = run(args.heap, args.requests, args.burst, args.idle)
+    print(f"{'':<8}{'p50':>8}{'p90':>8}{'p99':>8}{'p99.9':>9}{'max':>9}  gc collections (gen 0/1/2)", file=sys.stderr)
+    for name in ('default', 'policy'):
+        result = results[name]
+        print(f"{name:<8}{result['p50_us']:>6}us{result['p90_us']:>6}us{result['p99_us']:>6}us"
+              f"{result['p99.9_us']:>7}us{result['max_us']:>7}us  {'/'.join(map(str, result['collections']))}",
+              file=sys.stderr)
+
+    if args.output:
+        data = json.dumps(results, indent=2)
+        if args.output == '-':
+            sys.stdout.write(data + '\n')
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(data + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
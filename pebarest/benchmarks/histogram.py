@@ -0,0 +1,83 @@
+import math
+
+from typing import Dict, Iterable, List, Tuple
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of integer values (e.g. microseconds). Values are grouped in buckets whose
+    width doubles at every power of two, each one split in linear sub-buckets, so every recorded
+    value keeps `significant_figures` decimal digits of precision with a small, sparse memory footprint.
+    """
+    significant_figures: int
+    total_count: int
+
+    def __init__(self, significant_figures: int = 3):
+        if not 1 <= significant_figures <= 5:
+            raise ValueError('significant_figures must be between 1 and 5.')
+        self.significant_figures = significant_figures
+        largest_single_unit_value = 2 * 10 ** significant_figures
+        self._sub_bucket_magnitude = math.ceil(math.log2(largest_single_unit_value))
+        self._counts: Dict[Tuple[int, int], int] = {}
+        self.total_count = 0
+        self.min = None
+        self.max = 0
+        self._sum = 0
+
+    def _key(self, value: int) -> Tuple[int, int]:
+        bucket = max(0, value.bit_length() - self._sub_bucket_magnitude)
+        return bucket, value >> bucket
+
+    @staticmethod
+    def _highest_equivalent_value(key: Tuple[int, int]) -> int:
+        bucket, sub_bucket = key
+        return (sub_bucket << bucket) + (1 << bucket) - 1
+
+    def record(self, value: int, count: int = 1):
+        if value < 0:
+            raise ValueError('The histogram only records non negative values.')
+        value = int(value)
+        key = self._key(value)
+        self._counts[key] = self._counts.get(key, 0) + count
+        self.total_count += count
+        self._sum += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'LatencyHistogram'):
+        for value, count in other.to_list():
+            self.record(value, count)
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.total_count if self.total_count else 0.0
+
+    def value_at_percentile(self, percentile: float) -> int:
+        if not self.total_count:
+            return 0
+        target = max(1, math.ceil(percentile / 100 * self.total_count))
+        cumulative = 0
+        for key in sorted(self._counts):
+            cumulative += self._counts[key]
+            if cumulative >= target:
+                return min(self._highest_equivalent_value(key), self.max)
+        return self.max
+
+    def percentiles(self, percentiles: Iterable[float] = (50, 90, 99, 99.9)) -> Dict[str, int]:
+        return {f'p{percentile:g}': self.value_at_percentile(percentile) for percentile in percentiles}
+
+    def to_list(self) -> List[Tuple[int, int]]:
+        """Returns the (highest_equivalent_value, count) pairs, ordered by value."""
+        return [(self._highest_equivalent_value(key), self._counts[key]) for key in sorted(self._counts)]
+
+    @classmethod
+    def from_list(cls, pairs: Iterable[Tuple[int, int]], significant_figures: int = 3) -> 'LatencyHistogram':
+        histogram = cls(significant_figures)
+        for value, count in pairs:
+            histogram.record(value, count)
+        return histogram
+
+
+__all__ = ['LatencyHistogram']
@@ -0,0 +1,251 @@
+"""
+Load generator for a running PebaREST server, built on the standard library only.
+
+    python -m pebarest.benchmarks.loadgen scenario.json --url http://127.0.0.1:8000 -c 64 -d 30
+    python -m pebarest.benchmarks.loadgen scenario.json --rate 2000 -o run.json
+
+The scenario is a JSON list (or an object with a "requests" list) of
+{"method": "GET", "path": "/users/1", "headers": {...}, "body": {...}, "weight": 1} entries,
+replayed round-robin by keep-alive connections. Without --rate every connection sends its next
+request as soon as the previous response arrives (closed loop). With --rate requests are scheduled
+at a fixed arrival rate (open loop) and latency is measured from the scheduled time, so a stalled
+server is not hidden by the generator waiting for it.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from pebarest.benchmarks.histogram import LatencyHistogram
+
+
+class ScenarioRequest:
+    method: str
+    path: str
+    payload: bytes
+
+    def __init__(self, method: str, path: str, host: str, headers: Optional[Dict[str, str]] = None, body=None):
+        self.method = method.upper()
+        self.path = path
+        headers = dict(headers or {})
+        if body is None:
+            body_bytes = b''
+        elif isinstance(body, str):
+            body_bytes = body.encode('utf-8')
+        else:
+            body_bytes = json.dumps(body).encode('utf-8')
+            headers.setdefault('Content-Type', 'application/json')
+        headers.setdefault('Host', host)
+        headers.setdefault('Connection', 'keep-alive')
+        headers['Content-Length'] = str(len(body_bytes))
+        head = f'{self.method} {path} HTTP/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in headers.items()) + '\r\n'
+        self.payload = head.encode('latin-1') + body_bytes
+
+
+def load_scenario(path: str, host: str) -> List[ScenarioRequest]:
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data['requests'] if isinstance(data, dict) else data
+    requests = []
+    for entry in entries:
+        request = ScenarioRequest(entry.get('method', 'GET'), entry['path'], host, entry.get('headers'), entry.get('body'))
+        requests.extend([request] * int(entry.get('weight', 1)))
+    if not requests:
+        raise ValueError('The scenario has no requests.')
+    return requests
+
+
+async def read_response(reader: asyncio.StreamReader, method: str = 'GET') -> Tuple[int, bool, int]:
+    """Reads one HTTP response, returns (status, keep_alive, body_size)."""
+    while True:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('The server closed the connection.')
+        parts = status_line.decode('latin-1').split()
+        version, status = parts[0], int(parts[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        # Interim responses (100 Continue, 103 Early Hints) are followed by the final one.
+        if not 100 <= status < 200 or status == 101:
+            break
+
+    connection = headers.get('connection', '').lower()
+    keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+
+    if method == 'HEAD' or status in (101, 204, 304):
+        size = 0
+        keep_alive = keep_alive and status != 101
+    elif 'content-length' in headers:
+        size = int(headers['content-length'])
+        await reader.readexactly(size)
+    elif headers.get('transfer-encoding', '').lower() == 'chunked':
+        size = 0
+        while True:
+            chunk_size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(chunk_size + 2)
+            size += chunk_size
+            if chunk_size == 0:
+                break
+    elif not keep_alive:
+        # Without a length, only a response closing the connection has a body: it ends at EOF.
+        size = len(await reader.read())
+    else:
+        size = 0
+    return status, keep_alive, size
+
+
+class LoadGenerator:
+    """Drives `connections` keep-alive connections against the server and collects the latencies."""
+    histogram: LatencyHistogram
+    status_codes: Dict[int, int]
+
+    def __init__(self, url: str, requests: List[ScenarioRequest], connections: int = 16, duration: float = 10.0,
+                 rate: Optional[float] = None, timeout: float = 10.0, warmup: float = 0.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname or '127.0.0.1'
+        self.port = parts.port or 80
+        self.requests = requests
+        self.connections = connections
+        self.duration = duration
+        self.rate = rate
+        self.timeout = timeout
+        self.warmup = warmup
+        self.histogram = LatencyHistogram()
+        self.status_codes = {}
+        self.errors = 0
+        self.reconnects = 0
+        self.bytes_received = 0
+        self._scenario = itertools.cycle(requests)
+
+    async def _worker(self, schedule: Optional[asyncio.Queue], measure_from: float, deadline: float):
+        reader = writer = None
+        try:
+            while True:
+                if schedule is None:
+                    now = time.perf_counter()
+                    if now >= deadline:
+                        return
+                    intended = now
+                else:
+                    intended = await schedule.get()
+                    if intended is None:
+                        return
+                request = next(self._scenario)
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(self.host, self.port)
+                    writer.write(request.payload)
+                    status, keep_alive, size = await asyncio.wait_for(read_response(reader, request.method), self.timeout)
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError):
+                    self.errors += 1
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+                    continue
+                finished = time.perf_counter()
+                if intended >= measure_from:
+                    self.histogram.record(int((finished - intended) * 1e6))
+                    self.status_codes[status] = self.status_codes.get(status, 0) + 1
+                    self.bytes_received += size
+                if not keep_alive:
+                    writer.close()
+                    reader = writer = None
+                    self.reconnects += 1
+        finally:
+            if writer is not None:
+                writer.close()
+
+    async def _schedule(self, schedule: asyncio.Queue, deadline: float):
+        interval = 1 / self.rate
+        next_at = time.perf_counter()
+        while next_at < deadline:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            schedule.put_nowait(next_at)
+            next_at += interval
+        for _ in range(self.connections):
+            schedule.put_nowait(None)
+
+    async def _run(self) -> float:
+        started = time.perf_counter()
+        measure_from = started + self.warmup
+        deadline = measure_from + self.duration
+        schedule = asyncio.Queue() if self.rate else None
+        tasks = [asyncio.ensure_future(self._worker(schedule, measure_from, deadline)) for _ in range(self.connections)]
+        if schedule is not None:
+            tasks.append(asyncio.ensure_future(self._schedule(schedule, deadline)))
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - measure_from
+
+    def run(self) -> Dict[str, object]:
+        elapsed = asyncio.run(self._run())
+        completed = self.histogram.total_count
+        return {
+            "url": f'http://{self.host}:{self.port}',
+            "mode": 'open-loop' if self.rate else 'closed-loop',
+            "connections": self.connections,
+            "target_rate": self.rate,
+            "duration_s": round(elapsed, 3),
+            "requests": completed,
+            "errors": self.errors,
+            "reconnects": self.reconnects,
+            "status_codes": {str(status): count for status, count in sorted(self.status_codes.items())},
+            "throughput_rps": round(completed / elapsed, 1) if elapsed > 0 else 0.0,
+            "bytes_received": self.bytes_received,
+            "latency_us": {
+                "min": self.histogram.min or 0,
+                "mean": round(self.histogram.mean, 1),
+                **self.histogram.percentiles((50, 90, 99, 99.9)),
+                "max": self.histogram.max,
+            },
+            "histogram_us": self.histogram.to_list(),
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pebarest.benchmarks.loadgen',
+                                     description='Drives a running PebaREST server with a request scenario.')
+    parser.add_argument('scenario', help='JSON scenario file.')
+    parser.add_argument('-u', '--url', default='http://127.0.0.1:8000', help='Server base URL.')
+    parser.add_argument('-c', '--connections', type=int, default=16, help='Concurrent keep-alive connections.')
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='Measured seconds.')
+    parser.add_argument('-w', '--warmup', type=float, default=1.0, help='Seconds of unmeasured warmup.')
+    parser.add_argument('-r', '--rate', type=float, help='Fixed arrival rate in requests/s (open loop).')
+    parser.add_argument('-t', '--timeout', type=float, default=10.0, help='Per request timeout in seconds.')
+    parser.add_argument('-o', '--output', help="Where to write the JSON report ('-' for stdout).")
+    args = parser.parse_args(argv)
+
+    host = urlsplit(args.url).netloc or '127.0.0.1'
+    generator = LoadGenerator(args.url, load_scenario(args.scenario, host), args.connections, args.duration,
+                              args.rate, args.timeout, args.warmup)
+    report = generator.run()
+
+    latency = report['latency_us']
+    print(f"{report['mode']}: {report['requests']} requests in {report['duration_s']}s "
+          f"({report['throughput_rps']} req/s), {report['errors']} errors", file=sys.stderr)
+    print('latency (us): ' + ', '.join(f'{name}={value}' for name, value in latency.items()), file=sys.stderr)
+
+    if args.output:
+        data = json.dumps(report, indent=2)
+        if args.output == '-':
+            sys.stdout.write(data + '\n')
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(data + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import json
+import platform
+import statistics
+import sys
+import timeit
+
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class Benchmark:
+    """
+    A benchmark case. `setup` builds the fixtures and returns the callable that is timed,
+    so the fixture cost never leaks into the measurement.
+    """
+    name: str
+    group: str
+    setup: Callable[[], Callable[[], object]]
+
+    def __init__(self, name: str, group: str, setup: Callable[[], Callable[[], object]]):
+        self.name = name
+        self.group = group
+        self.setup = setup
+
+    def run(self, repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+        func = self.setup()
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        number = max(1, int(number * min_time / 0.2))
+        timings = [elapsed / number * 1e9 for elapsed in timer.repeat(repeat=repeat, number=number)]
+        median = statistics.median(timings)
+        return {
+            "group": self.group,
+            "number": number,
+            "repeat": repeat,
+            "min_ns": round(min(timings), 1),
+            "median_ns": round(median, 1),
+            "max_ns": round(max(timings), 1),
+            "ops_per_sec": round(1e9 / median, 1),
+        }
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, group: str = 'micro'):
+    """Registers the decorated setup function as a benchmark case."""
+    def decorator(setup: Callable[[], Callable[[], object]]):
+        if name in BENCHMARKS:
+            raise ValueError(f"A benchmark named '{name}' is already registered.")
+        BENCHMARKS[name] = Benchmark(name, group, setup)
+        return setup
+    return decorator
+
+
+def select_benchmarks(patterns: Optional[Iterable[str]] = None, groups: Optional[Iterable[str]] = None) -> List[Benchmark]:
+    patterns = list(patterns or [])
+    groups = set(groups or [])
+    selected = []
+    for case in BENCHMARKS.values():
+        if groups and case.group not in groups:
+            continue
+        if patterns and not any(pattern in case.name for pattern in patterns):
+            continue
+        selected.append(case)
+    return selected
+
+
+def run_benchmarks(cases: Iterable[Benchmark], repeat: int = 5, min_time: float = 0.2,
+                   progress: Optional[Callable[[str, Dict[str, float]], None]] = None) -> Dict[str, object]:
+    results = {}
+    for case in cases:
+        results[case.name] = case.run(repeat=repeat, min_time=min_time)
+        if progress is not None:
+            progress(case.name, results[case.name])
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object],
+            threshold: float = 0.1) -> List[Tuple[str, float, float, float, bool]]:
+    """
+    Compares the median of every case present in both runs.
+    Returns (name, baseline_ns, current_ns, change, regressed) rows, `change` being relative.
+    """
+    rows = []
+    baseline_results = baseline.get("results", {})
+    for name, result in current.get("results", {}).items():
+        previous = baseline_results.get(name)
+        if previous is None:
+            continue
+        change = result["median_ns"] / previous["median_ns"] - 1
+        rows.append((name, previous["median_ns"], result["median_ns"], change, change > threshold))
+    return rows
+
+
+def load_results(path: str) -> Dict[str, object]:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_results(results: Dict[str, object], path: Optional[str]):
+    data = json.dumps(results, indent=2, sort_keys=True)
+    if path is None or path == '-':
+        sys.stdout.write(data + '\n')
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(data + '\n')
+
+
+__all__ = ['Benchmark', 'BENCHMARKS', 'benchmark', 'select_benchmarks', 'run_benchmarks', 'compare',
+           'load_results', 'save_results']
@@ -0,0 +1,133 @@
+"""
+Measures the cold import time of PebaREST and checks that the optional subsystems stay off the import path.
+
+    python -m pebarest.benchmarks.startup
+    python -m pebarest.benchmarks.startup --budget-ms 40 -r 10 -o startup.json
+
+Each run is a fresh interpreter started with `-X importtime`. The import time of a run is the sum of
+the cumulative times of every top-level `pebarest` entry: `from pebarest import App` loads
+`pebarest.api` through the package `__getattr__`, reported apart from `pebarest`. The exit status is 1
+when the median import time exceeds the budget (DEFAULT_BUDGET_MS unless given) or when a forbidden
+module was imported.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from typing import Dict, List, Optional, Sequence
+
+
+DEFAULT_STATEMENT = 'from pebarest import App'
+
+DEFAULT_BUDGET_MS = 40.0
+
+# Modules that `from pebarest import App` must not load: they belong to optional subsystems.
+FORBIDDEN_MODULES = (
+    'pebarest.testing',
+    'pebarest.debug.profiling',
+    'pebarest.debug.timing',
+    'pebarest.debug.memory',
+    'pebarest.debug.fork',
+    'tracemalloc',
+    'pebarest.metrics',
+    'pebarest.benchmarks.cases',
+    'pebarest.middleware.idempotency',
+    'pebarest.auth.key_store',
+    'pebarest.models.static_files',
+    'pebarest.sse',
+    'pebarest.utils.gc_policy',
+    'cProfile',
+    'logging',
+    'logging.handlers',
+    'urllib.parse',
+    'hmac',
+    'socket',
+    'concurrent.futures',
+    'multiprocessing',
+)
+
+
+def _parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Returns the cumulative import time in microseconds of the top-level entries of a `-X importtime`
+    report, the modules imported by the statement itself (the nested ones are indented).
+    """
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit() or parts[2].startswith('  '):
+            continue
+        cumulative[parts[2].strip()] = int(parts[1])
+    return cumulative
+
+
+def measure_import(statement: str = DEFAULT_STATEMENT, module: str = 'pebarest') -> Dict[str, object]:
+    """
+    Runs `statement` in a new interpreter, returns the import time of `module` and its submodules
+    imported apart, and the loaded modules.
+    """
+    code = f'{statement}\nimport sys\nprint("\\n".join(sys.modules))'
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                               capture_output=True, text=True, check=True)
+    cumulative = _parse_importtime(completed.stderr)
+    return {
+        "import_us": sum(time for name, time in cumulative.items()
+                         if name == module or name.startswith(module + '.')),
+        "modules": completed.stdout.split(),
+    }
+
+
+def check_startup(statement: str = DEFAULT_STATEMENT, repeat: int = 5,
+                  budget_ms: Optional[float] = DEFAULT_BUDGET_MS,
+                  forbidden: Sequence[str] = FORBIDDEN_MODULES) -> Dict[str, object]:
+    runs = [measure_import(statement) for _ in range(repeat)]
+    timings: List[int] = sorted(run['import_us'] for run in runs)
+    modules = set(runs[-1]['modules'])
+    median_ms = statistics.median(timings) / 1000
+    return {
+        "statement": statement,
+        "python": sys.version.split()[0],
+        "min_ms": round(timings[0] / 1000, 2),
+        "median_ms": round(median_ms, 2),
+        "max_ms": round(timings[-1] / 1000, 2),
+        "budget_ms": budget_ms,
+        "over_budget": budget_ms is not None and median_ms > budget_ms,
+        "pebarest_modules": sorted(name for name in modules if name.split('.')[0] == 'pebarest'),
+        "forbidden_loaded": sorted(name for name in forbidden if name in modules),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pebarest.benchmarks.startup',
+                                     description='Checks the cold import time of PebaREST.')
+    parser.add_argument('-s', '--statement', default=DEFAULT_STATEMENT, help='Import statement to measure.')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Fresh interpreters to measure (default: 5).')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Maximum median import time in milliseconds (default: {DEFAULT_BUDGET_MS:g}).')
+    parser.add_argument('-o', '--output', help="Where to write the JSON report ('-' for stdout).")
+    args = parser.parse_args(argv)
+
+    report = check_startup(args.statement, args.repeat, args.budget_ms)
+    print(f"{report['statement']}: median {report['median_ms']} ms (min {report['min_ms']}, max {report['max_ms']}), "
+          f"{len(report['pebarest_modules'])} pebarest modules", file=sys.stderr)
+    for name in report['forbidden_loaded']:
+        print(f'forbidden module imported: {name}', file=sys.stderr)
+    if report['over_budget']:
+        print(f"over budget: {report['median_ms']} ms > {report['budget_ms']} ms", file=sys.stderr)
+
+    if args.output:
+        data = json.dumps(report, indent=2)
+        if args.output == '-':
+            sys.stdout.write(data + '\n')
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(data + '\n')
+    return 1 if report['over_budget'] or report['forbidden_loaded'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
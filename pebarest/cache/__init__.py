@@ -0,0 +1,2 @@
+from .base_cache import BaseCache
+from .memory_cache import MemoryCache
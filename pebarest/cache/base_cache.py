@@ -0,0 +1,52 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional, Union
+
+
+CacheKey = Union[str, bytes]
+
+
+class BaseCache:
+    """
+        Base class for caches of bytes values. All caches should inherit from this class, so the in-process
+        and the shared memory caches can be swapped without changing the code using them.
+    """
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        """
+            Returns a copy of the stored value, or None when the key is missing or expired.
+        """
+        raise NotImplementedError
+
+    def set(self, key: CacheKey, value: bytes, ttl: Optional[float] = None) -> bool:
+        """
+            Stores the value for `ttl` seconds (the cache default when None). Returns False when it doesn't fit.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: CacheKey) -> bool:
+        raise NotImplementedError
+
+    def incr(self, key: CacheKey, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """
+            Atomically adds `amount` to an integer value, starting from 0, and returns the new value.
+            The TTL is only set when the key is created, e.g. for rate limit windows.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    @contextmanager
+    def view(self, key: CacheKey) -> Iterator[Optional[memoryview]]:
+        """
+            Yields a read-only memoryview of the stored value without copying it, or None.
+            The view is only valid inside the `with` block.
+        """
+        value = self.get(key)
+        yield memoryview(value) if value is not None else None
+
+
+def encode_key(key: CacheKey) -> bytes:
+    return key.encode('utf-8') if isinstance(key, str) else bytes(key)
+
+
+__all__ = ['BaseCache', 'CacheKey', 'encode_key']
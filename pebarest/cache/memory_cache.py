@@ -0,0 +1,96 @@
+import threading
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Optional, Tuple
+
+from pebarest.cache.base_cache import BaseCache, CacheKey, encode_key
+
+
+class MemoryCache(BaseCache):
+    """
+        In-process LRU cache bounded by the total size of the stored keys and values.
+    """
+    max_bytes: int
+    default_ttl: Optional[float]
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, default_ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.__entries: 'OrderedDict[bytes, Tuple[bytes, Optional[float]]]' = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Bytes used by the stored keys and values."""
+        return self.__size
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __expires_at(self, ttl: Optional[float]) -> Optional[float]:
+        ttl = self.default_ttl if ttl is None else ttl
+        return monotonic() + ttl if ttl is not None else None
+
+    def __lookup(self, key: bytes) -> Optional[bytes]:
+        entry = self.__entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= monotonic():
+            self.__remove(key)
+            return None
+        self.__entries.move_to_end(key)
+        return value
+
+    def __remove(self, key: bytes):
+        value, _ = self.__entries.pop(key)
+        self.__size -= len(key) + len(value)
+
+    def __store(self, key: bytes, value: bytes, expires_at: Optional[float]) -> bool:
+        entry_size = len(key) + len(value)
+        if entry_size > self.max_bytes:
+            return False
+        if key in self.__entries:
+            self.__remove(key)
+        while self.__size + entry_size > self.max_bytes:
+            self.__remove(next(iter(self.__entries)))
+        self.__entries[key] = (value, expires_at)
+        self.__size += entry_size
+        return True
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        with self.__lock:
+            return self.__lookup(encode_key(key))
+
+    def set(self, key: CacheKey, value: bytes, ttl: Optional[float] = None) -> bool:
+        with self.__lock:
+            return self.__store(encode_key(key), bytes(value), self.__expires_at(ttl))
+
+    def delete(self, key: CacheKey) -> bool:
+        key = encode_key(key)
+        with self.__lock:
+            if key not in self.__entries:
+                return False
+            self.__remove(key)
+            return True
+
+    def incr(self, key: CacheKey, amount: int = 1, ttl: Optional[float] = None) -> int:
+        key = encode_key(key)
+        with self.__lock:
+            current = self.__lookup(key)
+            if current is None:
+                value, expires_at = amount, self.__expires_at(ttl)
+            else:
+                value, expires_at = int(current) + amount, self.__entries[key][1]
+            self.__store(key, str(value).encode('ascii'), expires_at)
+            return value
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+
+__all__ = ['MemoryCache']
@@ -0,0 +1,177 @@
+import hashlib
+import mmap
+import multiprocessing
+import struct
+import time
+
+from contextlib import contextmanager
+from typing import Iterator, Optional, Tuple
+
+from pebarest.cache.base_cache import BaseCache, CacheKey, encode_key
+
+
+# key hash (0 marks an empty slot), expires at (0 for no TTL), last access, key length, value length
+_SLOT_HEADER = struct.Struct('<QddHI2x')
+_LAST_ACCESS = struct.Struct('<d')
+_LAST_ACCESS_OFFSET = 16
+
+
+class SharedMemoryCache(BaseCache):
+    """
+        Cache shared by every worker process forked after its creation, stored in an anonymous shared mmap.
+
+        The memory is a fixed-size hash table of `slot_size` byte slots grouped in buckets of `ways` slots,
+        so `max_bytes` bounds the whole cache. A key lives in the bucket of its hash, when the bucket is
+        full the least recently read slot is evicted. Buckets are guarded by `stripes` process-shared locks.
+        An entry (key and value) must fit in `slot_size` minus a 32 bytes header, `set` returns False otherwise.
+
+        Create it in the master process, before the workers are forked.
+    """
+    max_bytes: int
+    slot_size: int
+    ways: int
+    default_ttl: Optional[float]
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, slot_size: int = 1024, ways: int = 8,
+                 stripes: int = 64, default_ttl: Optional[float] = None):
+        if slot_size <= _SLOT_HEADER.size or ways < 1 or stripes < 1:
+            raise ValueError(f'slot_size must be above {_SLOT_HEADER.size} bytes, ways and stripes positive.')
+        self.slot_size = slot_size
+        self.ways = ways
+        self.buckets = max(1, max_bytes // (slot_size * ways))
+        self.max_bytes = self.buckets * ways * slot_size
+        self.default_ttl = default_ttl
+        self._mmap = mmap.mmap(-1, self.max_bytes)
+        self._buffer = memoryview(self._mmap)
+        self._locks = [multiprocessing.Lock() for _ in range(min(stripes, self.buckets))]
+
+    @property
+    def max_entry_size(self) -> int:
+        """Largest key plus value size that fits in a slot."""
+        return self.slot_size - _SLOT_HEADER.size
+
+    def __locate(self, key: bytes) -> Tuple[int, int, 'multiprocessing.synchronize.Lock']:
+        key_hash = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), 'little') or 1
+        bucket = key_hash % self.buckets
+        return key_hash, bucket * self.ways * self.slot_size, self._locks[bucket % len(self._locks)]
+
+    def __find(self, key: bytes, key_hash: int, bucket_offset: int, now: float) -> Tuple[int, int, int]:
+        """
+            Returns (offset, key length, value length) of the key slot, with offset -1 when missing.
+            Expired slots are emptied on the way.
+        """
+        buffer = self._buffer
+        for offset in range(bucket_offset, bucket_offset + self.ways * self.slot_size, self.slot_size):
+            slot_hash, expires_at, _, key_length, value_length = _SLOT_HEADER.unpack_from(buffer, offset)
+            if slot_hash != key_hash:
+                continue
+            if expires_at and expires_at <= now:
+                _SLOT_HEADER.pack_into(buffer, offset, 0, 0.0, 0.0, 0, 0)
+                continue
+            start = offset + _SLOT_HEADER.size
+            if buffer[start:start + key_length] == key:
+                return offset, key_length, value_length
+        return -1, 0, 0
+
+    def __victim(self, bucket_offset: int, now: float) -> int:
+        """Offset of an empty or expired slot of the bucket, or of its least recently read one."""
+        buffer = self._buffer
+        victim, oldest = bucket_offset, None
+        for offset in range(bucket_offset, bucket_offset + self.ways * self.slot_size, self.slot_size):
+            slot_hash, expires_at, last_access, _, _ = _SLOT_HEADER.unpack_from(buffer, offset)
+            if not slot_hash or (expires_at and expires_at <= now):
+                return offset
+            if oldest is None or last_access < oldest:
+                victim, oldest = offset, last_access
+        return victim
+
+    def __write(self, offset: int, key: bytes, key_hash: int, value: bytes, expires_at: float, now: float):
+        start = offset + _SLOT_HEADER.size
+        self._buffer[start:start + len(key)] = key
+        self._buffer[start + len(key):start + len(key) + len(value)] = value
+        _SLOT_HEADER.pack_into(self._buffer, offset, key_hash, expires_at, now, len(key), len(value))
+
+    def __expires_at(self, ttl: Optional[float], now: float) -> float:
+        ttl = self.default_ttl if ttl is None else ttl
+        return now + ttl if ttl is not None else 0.0
+
+    def get(self, key: CacheKey) -> Optional[bytes]:
+        with self.view(key) as value:
+            return bytes(value) if value is not None else None
+
+    @contextmanager
+    def view(self, key: CacheKey) -> Iterator[Optional[memoryview]]:
+        """
+            Yields a read-only memoryview of the value inside the shared memory. The bucket stays locked
+            until the `with` block exits, keep it short.
+        """
+        key = encode_key(key)
+        key_hash, bucket_offset, lock = self.__locate(key)
+        with lock:
+            now = time.time()
+            offset, key_length, value_length = self.__find(key, key_hash, bucket_offset, now)
+            if offset < 0:
+                yield None
+                return
+            _LAST_ACCESS.pack_into(self._buffer, offset + _LAST_ACCESS_OFFSET, now)
+            start = offset + _SLOT_HEADER.size + key_length
+            value = self._buffer[start:start + value_length].toreadonly()
+            try:
+                yield value
+            finally:
+                value.release()
+
+    def set(self, key: CacheKey, value: bytes, ttl: Optional[float] = None) -> bool:
+        key = encode_key(key)
+        if len(key) + len(value) > self.max_entry_size:
+            return False
+        key_hash, bucket_offset, lock = self.__locate(key)
+        with lock:
+            now = time.time()
+            offset, _, _ = self.__find(key, key_hash, bucket_offset, now)
+            if offset < 0:
+                offset = self.__victim(bucket_offset, now)
+            self.__write(offset, key, key_hash, value, self.__expires_at(ttl, now), now)
+        return True
+
+    def delete(self, key: CacheKey) -> bool:
+        key = encode_key(key)
+        key_hash, bucket_offset, lock = self.__locate(key)
+        with lock:
+            offset, _, _ = self.__find(key, key_hash, bucket_offset, time.time())
+            if offset < 0:
+                return False
+            _SLOT_HEADER.pack_into(self._buffer, offset, 0, 0.0, 0.0, 0, 0)
+            return True
+
+    def incr(self, key: CacheKey, amount: int = 1, ttl: Optional[float] = None) -> int:
+        key = encode_key(key)
+        key_hash, bucket_offset, lock = self.__locate(key)
+        with lock:
+            now = time.time()
+            offset, key_length, value_length = self.__find(key, key_hash, bucket_offset, now)
+            if offset < 0:
+                value, expires_at = amount, self.__expires_at(ttl, now)
+                offset = self.__victim(bucket_offset, now)
+            else:
+                start = offset + _SLOT_HEADER.size + key_length
+                value = int(bytes(self._buffer[start:start + value_length])) + amount
+                expires_at = _SLOT_HEADER.unpack_from(self._buffer, offset)[1]
+            encoded = str(value).encode('ascii')
+            if len(key) + len(encoded) > self.max_entry_size:
+                raise ValueError('The key is too long to be stored.')
+            self.__write(offset, key, key_hash, encoded, expires_at, now)
+            return value
+
+    def clear(self):
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            for offset in range(0, self.max_bytes, self.slot_size):
+                _SLOT_HEADER.pack_into(self._buffer, offset, 0, 0.0, 0.0, 0, 0)
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+
+__all__ = ['SharedMemoryCache']
@@ -0,0 +1,21 @@
+_LAZY_ATTRIBUTES = {
+    'RequestProfiler': 'pebarest.debug.profiling',
+    'SlowRequestMonitor': 'pebarest.debug.profiling',
+    'sign_profile_trigger': 'pebarest.debug.profiling',
+    'ServerTiming': 'pebarest.debug.timing',
+    'MemoryTracker': 'pebarest.debug.memory',
+    'memory_sharing': 'pebarest.debug.fork',
+    'fork_report': 'pebarest.debug.fork',
+}
+
+
+def __getattr__(name):
+    # The debug tools are only imported when used.
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'pebarest.debug' has no attribute '{name}'")
+    import importlib
+    return getattr(importlib.import_module(module_name), name)
+
+
+__all__ = list(_LAZY_ATTRIBUTES)
@@ -0,0 +1,148 @@
+"""
+Reports how much memory the workers of a pre-fork server share with their master.
+
+    python -m pebarest.debug.fork myproject.wsgi:app --workers 4 -p /items -p /users/1
+    python -m pebarest.debug.fork myproject.wsgi:app --workers 4 --no-freeze
+
+The app is loaded and prepared with `App.prepare_for_fork` (only frozen with --no-freeze), then the
+workers are forked. Each one serves the given paths and runs a full collection, as a long running
+worker eventually does, before reading its `/proc/self/smaps_rollup`. Compare the private memory of
+the workers with and without --no-freeze. Linux only.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+
+from typing import Dict, List, Sequence, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pebarest.api.app import App
+
+
+_SMAPS_FIELDS = {
+    'Rss': 'rss',
+    'Pss': 'pss',
+    'Shared_Clean': 'shared_clean',
+    'Shared_Dirty': 'shared_dirty',
+    'Private_Clean': 'private_clean',
+    'Private_Dirty': 'private_dirty',
+}
+
+
+def memory_sharing(pid: Union[int, str] = 'self') -> Dict[str, int]:
+    """
+    Resident memory of a process in bytes, split into the pages shared with other processes and its
+    private ones, from `/proc/<pid>/smaps_rollup` (or the slower `smaps` on kernels older than 4.14).
+    Raises OSError where procfs isn't available.
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        with open(f'/proc/{pid}/smaps') as f:
+            lines = f.readlines()
+    sharing = dict.fromkeys(_SMAPS_FIELDS.values(), 0)
+    for line in lines:
+        name, _, value = line.partition(':')
+        key = _SMAPS_FIELDS.get(name)
+        if key is not None:
+            # The values are in kB.
+            sharing[key] += int(value.split()[0]) * 1024
+    sharing['shared'] = sharing['shared_clean'] + sharing['shared_dirty']
+    sharing['private'] = sharing['private_clean'] + sharing['private_dirty']
+    return sharing
+
+
+def fork_report(app: 'App', workers: int = 2, paths: Sequence[str] = (), freeze: bool = True) -> Dict[str, object]:
+    """
+    Prepares the app, forks `workers` processes serving `paths` and returns the memory sharing of the
+    master and of every worker once it ran a full collection.
+    """
+    if freeze:
+        frozen = app.prepare_for_fork()
+    else:
+        app.freeze()
+        frozen = 0
+    report = {'frozen_objects': frozen, 'master': memory_sharing(), 'workers': []}
+    children: List[tuple] = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            status = 0
+            try:
+                _serve(app, paths)
+                gc.collect()
+                os.write(write_fd, json.dumps(memory_sharing()).encode())
+            except BaseException:
+                status = 1
+            finally:
+                os._exit(status)
+        os.close(write_fd)
+        children.append((pid, read_fd))
+    for pid, read_fd in children:
+        with os.fdopen(read_fd, 'rb') as pipe:
+            data = pipe.read()
+        os.waitpid(pid, 0)
+        if data:
+            report['workers'].append(dict(json.loads(data), pid=pid))
+    if freeze:
+        gc.unfreeze()
+    return report
+
+
+def _serve(app: 'App', paths: Sequence[str]):
+    from io import BytesIO
+    for path in paths:
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.input': BytesIO(),
+            'wsgi.url_scheme': 'http',
+        }
+        for _ in app(environ, lambda status, headers, exc_info=None: None):
+            pass
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pebarest.debug.fork',
+                                     description='Reports the memory shared by forked PebaREST workers.')
+    parser.add_argument('app', help="The App, as 'module:attribute'.")
+    parser.add_argument('-w', '--workers', type=int, default=2, help='Workers to fork (default: 2).')
+    parser.add_argument('-p', '--path', action='append', default=[], help='GET path served by every worker.')
+    parser.add_argument('--no-freeze', action='store_true', help="Don't call gc.freeze() before forking.")
+    parser.add_argument('-o', '--output', help="Where to write the JSON report ('-' for stdout).")
+    args = parser.parse_args(argv)
+
+    from pebarest.utils.imports import import_string
+    report = fork_report(import_string(args.app), args.workers, args.path, freeze=not args.no_freeze)
+
+    def mib(size: int) -> str:
+        return f'{size / 1048576:>9.1f}'
+
+    print(f"{'process':<16}{'rss MiB':>9}{'pss MiB':>9}{'shared':>9}{'private':>9}", file=sys.stderr)
+    for name, sharing in [('master', report['master'])] + [(f"worker {w['pid']}", w) for w in report['workers']]:
+        print(f"{name:<16}{mib(sharing['rss'])}{mib(sharing['pss'])}{mib(sharing['shared'])}{mib(sharing['private'])}",
+              file=sys.stderr)
+    print(f"frozen objects: {report['frozen_objects']}", file=sys.stderr)
+
+    if args.output:
+        data = json.dumps(report, indent=2)
+        if args.output == '-':
+            sys.stdout.write(data + '\n')
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(data + '\n')
+    return 0 if len(report['workers']) == args.workers else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+import hmac
+import json
+import logging
+import os
+import random
+import threading
+import tracemalloc
+
+from time import monotonic
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pebarest.models.response import Response
+
+
+DEFAULT_TOKEN_HEADER = 'X-Peba-Debug-Token'
+
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+class _RouteMemory:
+    __slots__ = ('requests', 'net_bytes', 'sites')
+
+    def __init__(self):
+        self.requests = 0
+        self.net_bytes = 0
+        self.sites: Dict[str, int] = {}
+
+
+class MemoryTracker:
+    """
+    Attributes the memory allocated by the requests to their route templates with tracemalloc.
+
+    Tracking runs between `start` and `stop` (or for `duration` seconds), tracemalloc slows every
+    allocation down while it runs. A `sample_rate` fraction of the requests is measured, one at a time:
+    the net traced memory after dispatching the request (the response included, as it is not sent yet)
+    and the allocation sites that grew, from snapshots taken around it. Concurrent requests allocate
+    during the measure too, so the figures are indicative, read them over many samples.
+
+    The report holds the top `top_n` sites per route and the diff of the traced memory since `start`.
+    It is served on `path` to requests carrying the `token` in the `token_header` (GET for the report,
+    POST with `?action=start|stop|reset` and an optional `duration`), and logged on `signal_number`.
+    """
+    sample_rate: float
+    top_n: int
+    frames: int
+    path: Optional[str]
+
+    def __init__(
+            self,
+            sample_rate: float = 0.01,
+            top_n: int = 10,
+            frames: int = 1,
+            path: Optional[str] = '/debug/memory',
+            token: Optional[str] = None,
+            token_header: str = DEFAULT_TOKEN_HEADER,
+            signal_number: Optional[int] = None,
+            logger: Optional[logging.Logger] = None
+    ):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError('sample_rate must be between 0 and 1.')
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.frames = frames
+        self.path = path if token else None
+        self.token = token
+        self.token_environ_key = 'HTTP_' + token_header.upper().replace('-', '_')
+        self.logger = logger or logging.getLogger('pebarest.memory')
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+        if signal_number is not None:
+            import signal
+            signal.signal(signal_number, lambda signum, frame: self.log_report())
+
+    def _reset(self):
+        self._routes: Dict[str, _RouteMemory] = {}
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+        self._active = False
+        self._started_tracing = False
+        self._stop_at: Optional[float] = None
+
+    def _reset_after_fork(self):
+        # The parent's figures don't describe the child, tracing goes on if it was active.
+        active, started_tracing, stop_at = self._active, self._started_tracing, self._stop_at
+        self._reset()
+        self._active, self._started_tracing, self._stop_at = active, started_tracing, stop_at
+        if active:
+            self._baseline = self._snapshot()
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def start(self, duration: Optional[float] = None):
+        """Starts tracking, for `duration` seconds when given."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._baseline = self._snapshot()
+        self._stop_at = monotonic() + duration if duration else None
+        self._active = True
+
+    def stop(self):
+        """Stops tracking and tracemalloc, unless it was started by someone else. The report is kept."""
+        self._active = False
+        self._stop_at = None
+        if self._started_tracing:
+            self._started_tracing = False
+            tracemalloc.stop()
+
+    def reset(self):
+        """Clears the per-route figures and takes a new baseline."""
+        self._routes = {}
+        if tracemalloc.is_tracing():
+            self._baseline = self._snapshot()
+
+    def run(self, environ: dict, dispatch: Callable[[dict], Tuple[Optional[str], Response]]):
+        """
+        Calls `dispatch(environ)`, which returns `(route, response)`, measuring it when sampled.
+        """
+        if self.path is not None and environ.get('PATH_INFO') == self.path:
+            return self.path, self.handle(environ)
+        if not self._active or not (self.sample_rate and random.random() < self.sample_rate):
+            return dispatch(environ)
+        if self._stop_at is not None and monotonic() >= self._stop_at:
+            self.stop()
+            return dispatch(environ)
+        if not self._lock.acquire(blocking=False):
+            return dispatch(environ)
+        try:
+            before = self._snapshot()
+            traced_before = tracemalloc.get_traced_memory()[0]
+            route, response = dispatch(environ)
+            net_bytes = tracemalloc.get_traced_memory()[0] - traced_before
+            self._record(route or environ.get('PATH_INFO', '/'), net_bytes, self._snapshot().compare_to(before, 'lineno'))
+            return route, response
+        finally:
+            self._lock.release()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    def _record(self, route: str, net_bytes: int, diff: List[tracemalloc.StatisticDiff]):
+        stats = self._routes.get(route)
+        if stats is None:
+            stats = self._routes[route] = _RouteMemory()
+        stats.requests += 1
+        stats.net_bytes += net_bytes
+        sites = stats.sites
+        for statistic in diff:
+            if statistic.size_diff > 0:
+                site = _site(statistic.traceback)
+                sites[site] = sites.get(site, 0) + statistic.size_diff
+        if len(sites) > self.top_n * 4:
+            # Only the largest sites are kept, the small ones come and go between samples.
+            stats.sites = dict(sorted(sites.items(), key=lambda item: item[1], reverse=True)[:self.top_n * 2])
+
+    def report(self) -> dict:
+        routes = {}
+        for route, stats in sorted(self._routes.items(), key=lambda item: item[1].net_bytes, reverse=True):
+            top_sites = sorted(stats.sites.items(), key=lambda item: item[1], reverse=True)[:self.top_n]
+            routes[route] = {
+                'requests': stats.requests,
+                'net_bytes': stats.net_bytes,
+                'avg_net_bytes': stats.net_bytes // stats.requests,
+                'top_sites': [{'site': site, 'bytes': size} for site, size in top_sites],
+            }
+        report = {'active': self._active, 'tracing': tracemalloc.is_tracing(), 'pid': os.getpid(), 'routes': routes}
+        if tracemalloc.is_tracing():
+            traced, peak = tracemalloc.get_traced_memory()
+            report['traced_bytes'] = traced
+            report['peak_bytes'] = peak
+            if self._baseline is not None:
+                diff = self._snapshot().compare_to(self._baseline, 'lineno')[:self.top_n]
+                report['since_start'] = [
+                    {'site': _site(statistic.traceback), 'size_diff': statistic.size_diff,
+                     'count_diff': statistic.count_diff}
+                    for statistic in diff
+                ]
+        return report
+
+    def log_report(self):
+        self.logger.warning('Memory report: %s', json.dumps(self.report()))
+
+    def handle(self, environ: dict) -> Response:
+        """Debug endpoint: GET returns the report, POST `?action=start|stop|reset&duration=` controls tracking."""
+        headers = {'Content-Type': 'application/json'}
+        # WSGI header values are latin-1 decoded, compared as bytes they can't raise on non-ASCII text.
+        token = environ.get(self.token_environ_key, '').encode('latin-1', 'replace')
+        if not hmac.compare_digest(token, self.token.encode()):
+            return Response(404, headers, {'title': 'Resource not found'})
+        if environ.get('REQUEST_METHOD') == 'POST':
+            from urllib.parse import parse_qs
+            params = parse_qs(environ.get('QUERY_STRING', ''))
+            action = params.get('action', [''])[0]
+            if action == 'start':
+                try:
+                    duration = float(params['duration'][0]) if 'duration' in params else None
+                except ValueError:
+                    return Response(400, headers, {'title': 'duration must be a number of seconds.'})
+                self.start(duration)
+            elif action == 'stop':
+                self.stop()
+            elif action == 'reset':
+                self.reset()
+            else:
+                return Response(400, headers, {'title': 'action must be start, stop or reset.'})
+        return Response(200, headers, self.report())
+
+
+def _site(traceback: tracemalloc.Traceback) -> str:
+    frame = traceback[0]
+    return f'{frame.filename}:{frame.lineno}'
+
+
+__all__ = ['MemoryTracker', 'DEFAULT_TOKEN_HEADER']
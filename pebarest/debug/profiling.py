@@ -0,0 +1,195 @@
+import cProfile
+import hashlib
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+
+from time import perf_counter
+from typing import Callable, Dict, Optional, Tuple
+
+
+DEFAULT_TRIGGER_HEADER = 'X-Peba-Profile'
+
+_UNSAFE_FILENAME_RE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def sign_profile_trigger(secret: str, method: str, path: str, timestamp: Optional[int] = None) -> str:
+    """
+    Builds the value of the profiling trigger header for a request: `<timestamp>:<hmac-sha256>`.
+    """
+    if timestamp is None:
+        timestamp = int(time.time())
+    message = f'{timestamp}:{method.upper()}:{path}'.encode('utf-8')
+    signature = hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+    return f'{timestamp}:{signature}'
+
+
+def route_to_filename(route: str) -> str:
+    return _UNSAFE_FILENAME_RE.sub('_', route).strip('_') or 'root'
+
+
+class RequestProfiler:
+    """
+    Runs cProfile for a sampled fraction of the requests, or for requests carrying a trigger
+    header signed with `sign_profile_trigger`, and writes one `.pstats` file per profiled
+    request under `output_dir/<route>/`.
+    Only one request is profiled at a time, concurrent candidates are served without profiling.
+    """
+    output_dir: str
+    sample_rate: float
+    secret: Optional[str]
+
+    def __init__(
+            self,
+            output_dir: str = 'profiles',
+            sample_rate: float = 0.0,
+            secret: Optional[str] = None,
+            trigger_header: str = DEFAULT_TRIGGER_HEADER,
+            max_signature_age: int = 300,
+            logger: Optional[logging.Logger] = None
+    ):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError('sample_rate must be between 0 and 1.')
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.secret = secret
+        self.trigger_environ_key = 'HTTP_' + trigger_header.upper().replace('-', '_')
+        self.max_signature_age = max_signature_age
+        self.logger = logger or logging.getLogger('pebarest.profiling')
+        self._lock = threading.Lock()
+
+    def is_triggered(self, environ: dict) -> bool:
+        if self.secret is None:
+            return False
+        value = environ.get(self.trigger_environ_key)
+        if not value:
+            return False
+        timestamp, _, _ = value.partition(':')
+        try:
+            if abs(time.time() - int(timestamp)) > self.max_signature_age:
+                return False
+        except ValueError:
+            return False
+        expected = sign_profile_trigger(
+            self.secret, environ.get('REQUEST_METHOD', 'GET'), environ.get('PATH_INFO', '/'), int(timestamp))
+        # The header is client supplied: compared as bytes, non-ASCII values are a mismatch instead of a TypeError.
+        return hmac.compare_digest(expected.encode('ascii'), value.encode('latin-1', 'replace'))
+
+    def should_profile(self, environ: dict) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        return self.is_triggered(environ)
+
+    def run(self, environ: dict, dispatch: Callable[[dict], Tuple[Optional[str], object]]):
+        """
+        Calls `dispatch(environ)`, which returns `(route, response)`, under cProfile when selected.
+        """
+        if not self.should_profile(environ) or not self._lock.acquire(blocking=False):
+            return dispatch(environ)
+        try:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                route, response = dispatch(environ)
+            finally:
+                profile.disable()
+            try:
+                self.dump(profile, route or environ.get('PATH_INFO', '/'), environ.get('REQUEST_METHOD', 'GET'))
+            except OSError:
+                self.logger.exception('Could not write the request profile.')
+            return route, response
+        finally:
+            self._lock.release()
+
+    def dump(self, profile: cProfile.Profile, route: str, method: str) -> str:
+        directory = os.path.join(self.output_dir, route_to_filename(route))
+        os.makedirs(directory, exist_ok=True)
+        filename = os.path.join(directory, f'{method.lower()}-{time.time_ns()}-{os.getpid()}.pstats')
+        profile.dump_stats(filename)
+        self.logger.info('Profile of %s %s written to %s', method, route, filename)
+        return filename
+
+
+class SlowRequestMonitor:
+    """
+    Logs the current stack of any request running for longer than `threshold` seconds.
+    A background thread scans the in-flight requests, the request thread only registers
+    itself on entry and removes itself on exit. Each slow request is reported once.
+    """
+    threshold: float
+
+    def __init__(self, threshold: float = 1.0, interval: Optional[float] = None,
+                 logger: Optional[logging.Logger] = None):
+        if threshold <= 0:
+            raise ValueError('threshold must be greater than 0.')
+        self.threshold = threshold
+        self.interval = interval if interval is not None else min(threshold / 2, 1.0)
+        self.logger = logger or logging.getLogger('pebarest.slow_requests')
+        self._in_flight: Dict[int, Tuple[float, str, str]] = {}
+        self._thread = None
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._watch, name='pebarest-slow-requests', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _reset_after_fork(self):
+        self._in_flight = {}
+        self._thread = None
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def run(self, environ: dict, dispatch: Callable[[dict], Tuple[Optional[str], object]]):
+        if self._thread is None:
+            self.start()
+        ident = threading.get_ident()
+        self._in_flight[ident] = (perf_counter(), environ.get('REQUEST_METHOD', 'GET'), environ.get('PATH_INFO', '/'))
+        try:
+            return dispatch(environ)
+        finally:
+            self._in_flight.pop(ident, None)
+
+    def _watch(self):
+        reported = set()
+        while not self._stopped.wait(self.interval):
+            now = perf_counter()
+            slow = [(ident, entry) for ident, entry in list(self._in_flight.items())
+                    if now - entry[0] >= self.threshold]
+            if not slow:
+                reported.clear()
+                continue
+            frames = sys._current_frames()
+            still_running = set()
+            for ident, (started, method, path) in slow:
+                key = (ident, started)
+                still_running.add(key)
+                frame = frames.get(ident)
+                if key in reported or frame is None:
+                    continue
+                reported.add(key)
+                self.logger.warning(
+                    'Slow request %s %s running for %.3fs, stack:\n%s',
+                    method, path, now - started, ''.join(traceback.format_stack(frame))
+                )
+            reported &= still_running
+
+
+__all__ = ['RequestProfiler', 'SlowRequestMonitor', 'sign_profile_trigger', 'DEFAULT_TRIGGER_HEADER']
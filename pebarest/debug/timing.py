@@ -0,0 +1,117 @@
+import logging
+
+from time import perf_counter_ns
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pebarest.models.request import Request
+from pebarest.models.response import Response
+
+
+TIMINGS_ENVIRON_KEY = 'pebarest.timings'
+
+logger = logging.getLogger('pebarest.timing')
+
+
+class StageTimings:
+    """Durations, in nanoseconds, of the pipeline stages of a single request."""
+    __slots__ = ('started', 'stages')
+
+    def __init__(self):
+        self.started = perf_counter_ns()
+        self.stages: List[Tuple[str, int]] = []
+
+    def record(self, stage: str, started: int) -> int:
+        """Records the time elapsed since `started` and returns the current counter."""
+        now = perf_counter_ns()
+        self.stages.append((stage, now - started))
+        return now
+
+    def as_dict(self) -> Dict[str, int]:
+        durations = {}
+        for stage, duration in self.stages:
+            durations[stage] = durations.get(stage, 0) + duration
+        return durations
+
+    def to_header(self) -> str:
+        return ', '.join(f'{stage};dur={duration / 1e6:.3f}' for stage, duration in self.as_dict().items())
+
+
+class TimedRequest(Request):
+    """
+    Request that records the body parsing and validation stages into the `StageTimings`
+    that `ServerTiming` stores in the environ.
+    """
+    __slots__ = ('timings',)
+    timings: StageTimings
+
+    def __init__(self, environ: dict, body_type: type = None, client_info: dict = None,
+                 path_params: Dict[str, str] = None):
+        self.timings = environ.get(TIMINGS_ENVIRON_KEY) or StageTimings()
+        if body_type is not None and getattr(body_type, 'streamed', False):
+            # Parsed and validated inside the handler stage.
+            super().__init__(environ, body_type, client_info, path_params)
+            return
+        super().__init__(environ, None, client_info, path_params)
+        if body_type:
+            started = perf_counter_ns()
+            self.body = body_type(**self.body)
+            self.timings.record('validate', started)
+
+    @classmethod
+    def from_parts(cls, *args, **kwargs) -> 'TimedRequest':
+        request = super().from_parts(*args, **kwargs)
+        request.timings = StageTimings()
+        return request
+
+    def _parse_body(self, environ):
+        started = perf_counter_ns()
+        body = Request._parse_body(environ)
+        self.timings.record('parse', started)
+        return body
+
+
+class ServerTiming:
+    """
+    Records the parse, validate, auth, handler and serialize stages of every request with
+    `time.perf_counter_ns` and sends them in the `Server-Timing` header. The optional hook
+    receives `(environ, route, timings)` after each request, e.g. to export tracing spans.
+    """
+    hook: Optional[Callable[[dict, Optional[str], StageTimings], None]]
+    send_header: bool
+
+    def __init__(self, hook: Optional[Callable[[dict, Optional[str], StageTimings], None]] = None,
+                 send_header: bool = True):
+        self.hook = hook
+        self.send_header = send_header
+
+    def run(self, environ: dict, dispatch: Callable[[dict], Tuple[Optional[str], Response]]):
+        timings = environ[TIMINGS_ENVIRON_KEY] = StageTimings()
+        route, response = dispatch(environ)
+
+        body = None
+        if not response.streamed:
+            started = perf_counter_ns()
+            try:
+                body = b''.join(response.get_body_bytes())
+            except Exception:
+                # Left to App.__call__, which maps serialization errors to a 500 response.
+                return route, response
+            timings.record('serialize', started)
+        timings.stages.append(('total', perf_counter_ns() - timings.started))
+
+        headers = response.headers
+        if self.send_header:
+            headers = {**headers, 'Server-Timing': timings.to_header()}
+        if self.hook is not None:
+            try:
+                self.hook(environ, route, timings)
+            except Exception:
+                logger.exception('The server timing hook failed.')
+        if body is None:
+            # Streamed bodies are sent by App.__call__, the total excludes them.
+            response.headers = headers
+            return route, response
+        return route, Response(response.status, headers, body)
+
+
+__all__ = ['ServerTiming', 'StageTimings', 'TimedRequest', 'TIMINGS_ENVIRON_KEY']
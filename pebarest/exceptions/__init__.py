@@ -1,2 +1,3 @@
 from .base_model_exceptions import AttrTypeError, AttrListTypeError, AttrMissingError
-from .app_exeptions import RouteAlreadyExistsError, MethodNotAllowedError, NotFoundError
+from .app_exeptions import RouteAlreadyExistsError, MethodNotAllowedError, NotFoundError, AppFrozenError, \
+    PoolTimeoutError, UnauthorizedError, OffloadTimeoutError, HttpError
@@ -5,6 +5,12 @@ class RouteAlreadyExistsError(Exception):
         self.route_path = route_path
 
 
+class AppFrozenError(Exception):
+    def __init__(self, message: str = 'The App is frozen, call unfreeze() before changing it.'):
+        super().__init__(message)
+        self.message = message
+
+
 class MethodNotAllowedError(Exception):
     method: str
 
@@ -14,10 +20,11 @@ class MethodNotAllowedError(Exception):
 
 
 class NotFoundError(Exception):
+    DEFAULT_MESSAGE = 'Resource not found'
     message: str
     status_code: int
 
-    def __init__(self, message: str='Resource not found', status_code: int=404):
+    def __init__(self, message: str=DEFAULT_MESSAGE, status_code: int=404):
         self.message = message
         self.status_code = status_code
 
@@ -25,3 +32,30 @@ class NotFoundError(Exception):
 class UnauthorizedError(Exception):
     def __init__(self):
         self.title = f'401 Unauthorized'
+
+
+class PoolTimeoutError(Exception):
+    message: str
+
+    def __init__(self, message: str = 'No pooled object available.'):
+        super().__init__(message)
+        self.message = message
+
+
+class HttpError(Exception):
+    """Error response raised from a handler or a middleware, sent with the App headers and error format."""
+    message: str
+    status_code: int
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class OffloadTimeoutError(Exception):
+    message: str
+
+    def __init__(self, message: str = 'The handler did not finish in time.'):
+        super().__init__(message)
+        self.message = message
@@ -0,0 +1,2 @@
+from .registry import MetricsRegistry, Counter, Gauge, Histogram
+from .http_metrics import HttpMetrics
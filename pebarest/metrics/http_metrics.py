@@ -0,0 +1,96 @@
+import threading
+
+from typing import Dict, Optional, Sequence
+
+from pebarest.metrics.registry import MetricsRegistry, DEFAULT_LATENCY_BUCKETS, DEFAULT_SIZE_BUCKETS
+from pebarest.models.http import http_methods_list
+
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+UNMATCHED_ROUTE = '<unmatched>'
+OTHER_METHOD = 'other'
+
+_KNOWN_METHODS = frozenset(method.upper() for method in http_methods_list)
+
+
+class _RouteMetrics:
+    """The metric children of a (route, method) pair, resolved once and reused by every request."""
+    __slots__ = ('requests', 'duration', 'request_size', 'response_size', 'route', 'method', 'owner')
+
+    def __init__(self, owner: 'HttpMetrics', route: str, method: str):
+        self.owner = owner
+        self.route = route
+        self.method = method
+        self.requests = {}
+        self.duration = owner.request_duration.labels(route, method)
+        self.request_size = owner.request_size.labels(route, method)
+        self.response_size = owner.response_size.labels(route, method)
+
+    def requests_for(self, status: int):
+        child = self.requests.get(status)
+        if child is None:
+            child = self.requests[status] = self.owner.requests_total.labels(self.route, self.method, str(status))
+        return child
+
+
+class HttpMetrics:
+    """
+    Request metrics of an App, labeled by route template (never the raw path), method and status.
+    Requests that don't match any route share the `<unmatched>` route label, and the ones with an unknown
+    method the `other` method label.
+    """
+    registry: MetricsRegistry
+    content_type = PROMETHEUS_CONTENT_TYPE
+
+    def __init__(
+            self,
+            registry: Optional[MetricsRegistry] = None,
+            latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+            size_buckets: Sequence[float] = DEFAULT_SIZE_BUCKETS,
+            prefix: str = 'pebarest'
+    ):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        self.requests_total = self.registry.counter(
+            f'{prefix}_requests_total', 'Total of handled requests.', ('route', 'method', 'status'))
+        self.request_duration = self.registry.histogram(
+            f'{prefix}_request_duration_seconds', 'Request handling latency.', ('route', 'method'), latency_buckets)
+        self.request_size = self.registry.histogram(
+            f'{prefix}_request_size_bytes', 'Request body sizes.', ('route', 'method'), size_buckets)
+        self.response_size = self.registry.histogram(
+            f'{prefix}_response_size_bytes', 'Response body sizes.', ('route', 'method'), size_buckets)
+        self.in_flight = self.registry.gauge(
+            f'{prefix}_requests_in_flight', 'Requests currently being handled.')
+        self.__routes: Dict[str, Dict[str, _RouteMetrics]] = {}
+        self._lock = threading.Lock()
+
+    def _route_metrics(self, route: str, method: str) -> _RouteMetrics:
+        by_method = self.__routes.get(route)
+        if by_method is not None:
+            route_metrics = by_method.get(method)
+            if route_metrics is not None:
+                return route_metrics
+        with self._lock:
+            by_method = self.__routes.setdefault(route, {})
+            route_metrics = by_method.get(method)
+            if route_metrics is None:
+                route_metrics = by_method[method] = _RouteMetrics(self, route, method)
+        return route_metrics
+
+    def observe(self, route: Optional[str], method: str, status: int, duration: float,
+                request_size: int, response_size: int):
+        """
+        :param duration: Request duration in seconds.
+        """
+        if method not in _KNOWN_METHODS:
+            method = OTHER_METHOD
+        route_metrics = self._route_metrics(route or UNMATCHED_ROUTE, method)
+        route_metrics.requests_for(status).inc()
+        route_metrics.duration.observe(duration)
+        route_metrics.request_size.observe(request_size)
+        route_metrics.response_size.observe(response_size)
+
+    def render(self) -> bytes:
+        return self.registry.to_prometheus().encode('utf-8')
+
+
+__all__ = ['HttpMetrics', 'PROMETHEUS_CONTENT_TYPE', 'UNMATCHED_ROUTE', 'OTHER_METHOD']
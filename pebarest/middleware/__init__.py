@@ -0,0 +1,16 @@
+from .base_middleware import Middleware, compile_chain, wrap_middleware
+
+_LAZY_ATTRIBUTES = {
+    'Idempotency': 'pebarest.middleware.idempotency',
+    'IdempotencyStore': 'pebarest.middleware.idempotency',
+    'MemoryIdempotencyStore': 'pebarest.middleware.idempotency',
+}
+
+
+def __getattr__(name):
+    # The optional middlewares are only imported when used, `base_middleware` is on the import path.
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module 'pebarest.middleware' has no attribute '{name}'")
+    import importlib
+    return getattr(importlib.import_module(module_name), name)
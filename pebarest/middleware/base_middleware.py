@@ -0,0 +1,88 @@
+from typing import Callable, Iterable, Optional
+
+from pebarest.models.request import Request
+from pebarest.models.response import Response
+
+
+Endpoint = Callable[[Request], Response]
+
+
+class Middleware:
+    """
+        Base class for middlewares. Override any of `before`, `after` or `around`,
+        only the overridden hooks are wired into the compiled call chain.
+    """
+    def before(self, request: Request) -> Optional[Response]:
+        """
+            Runs before the handler. Returning a Response short-circuits the rest of the chain.
+        """
+        return None
+
+    def after(self, request: Request, response: Response) -> Response:
+        """
+            Runs after the handler and must return the response to be sent.
+        """
+        return response
+
+    def around(self, request: Request, call_next: Endpoint) -> Response:
+        """
+            Wraps the rest of the chain, `call_next(request)` runs it.
+        """
+        return call_next(request)
+
+
+def _overrides(middleware: Middleware, hook_name: str) -> bool:
+    return getattr(type(middleware), hook_name) is not getattr(Middleware, hook_name)
+
+
+def _wrap_before(before, call_next: Endpoint) -> Endpoint:
+    def chain(request):
+        response = before(request)
+        if response is not None:
+            return response
+        return call_next(request)
+    return chain
+
+
+def _wrap_after(after, call_next: Endpoint) -> Endpoint:
+    def chain(request):
+        return after(request, call_next(request))
+    return chain
+
+
+def _wrap_around(around, call_next: Endpoint) -> Endpoint:
+    def chain(request):
+        return around(request, call_next)
+    return chain
+
+
+def wrap_middleware(middleware, call_next: Endpoint) -> Endpoint:
+    """
+        Wraps `call_next` with a single middleware. Plain callables are treated as `around` hooks.
+    """
+    if not isinstance(middleware, Middleware):
+        if not callable(middleware):
+            raise TypeError('A middleware must be a Middleware instance or a callable.')
+        return _wrap_around(middleware, call_next)
+
+    if _overrides(middleware, 'around'):
+        call_next = _wrap_around(middleware.around, call_next)
+    if _overrides(middleware, 'after'):
+        call_next = _wrap_after(middleware.after, call_next)
+    if _overrides(middleware, 'before'):
+        call_next = _wrap_before(middleware.before, call_next)
+    return call_next
+
+
+def compile_chain(middlewares: Iterable, endpoint: Endpoint) -> Endpoint:
+    """
+        Composes the middlewares into nested callables around the endpoint, the first
+        middleware being the outermost one. Without middlewares the endpoint itself is returned.
+    """
+    chain = endpoint
+    for middleware in reversed(list(middlewares)):
+        chain = wrap_middleware(middleware, chain)
+    return chain
+
+
+__all__ = ['Middleware', 'compile_chain', 'wrap_middleware']
@@ -0,0 +1,259 @@
+import hashlib
+import threading
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, Dict, Iterable, Optional
+
+from pebarest.exceptions import HttpError
+from pebarest.middleware.base_middleware import Middleware, Endpoint
+from pebarest.models.request import Request
+from pebarest.models.response import Response
+from pebarest.utils.json import dumps
+
+
+class IdempotentRecord:
+    """
+        The execution of an idempotency key: in flight until `status` is set, then the stored response.
+    """
+    __slots__ = ('fingerprint', 'status', 'headers', 'body', 'expires_at', '_done')
+    # Memory of a completed record beside its bytes: the record, its event and the store entry, measured
+    # with tracemalloc on CPython 3.11.
+    OVERHEAD = 1400
+
+    def __init__(self, fingerprint: bytes):
+        self.fingerprint = fingerprint
+        self.status: Optional[int] = None
+        self.headers: Dict[str, str] = {}
+        self.body = b''
+        self.expires_at: Optional[float] = None
+        self._done = threading.Event()
+
+    @property
+    def completed(self) -> bool:
+        return self.status is not None
+
+    @property
+    def size(self) -> int:
+        return (self.OVERHEAD + len(self.fingerprint) + len(self.body)
+                + sum(len(name) + len(value) for name, value in self.headers.items()))
+
+
+class IdempotencyStore:
+    """
+        Storage of the idempotency keys executions. `reserve` must be atomic: a single caller reserves a key.
+    """
+    def reserve(self, key: bytes, fingerprint: bytes) -> Optional[IdempotentRecord]:
+        """
+            Reserves the key for an execution and returns None, or returns the existing record,
+            in flight or completed, when the key is already reserved.
+        """
+        raise NotImplementedError()
+
+    def wait(self, key: bytes, timeout: Optional[float]) -> Optional[IdempotentRecord]:
+        """
+            Waits for the in-flight execution of the key, returns its completed record or None
+            when it was released or still running after `timeout` seconds.
+        """
+        raise NotImplementedError()
+
+    def complete(self, key: bytes, status: int, headers: Dict[str, str], body: bytes, ttl: float):
+        """Stores the response of the reserved key for `ttl` seconds and wakes up the waiting duplicates."""
+        raise NotImplementedError()
+
+    def release(self, key: bytes):
+        """Drops the reservation of a failed execution, so the key can be retried."""
+        raise NotImplementedError()
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    """
+        In-process store, bounded by the size of the stored records, keys and responses plus a fixed
+        overhead per record. The oldest completed records are evicted first, the in-flight ones never.
+    """
+    max_bytes: int
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.__records: 'OrderedDict[bytes, IdempotentRecord]' = OrderedDict()
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Bytes used by the completed records."""
+        return self.__size
+
+    def __len__(self) -> int:
+        return len(self.__records)
+
+    def reserve(self, key: bytes, fingerprint: bytes) -> Optional[IdempotentRecord]:
+        with self.__lock:
+            record = self.__records.get(key)
+            if record is not None:
+                if not record.completed or record.expires_at > monotonic():
+                    return record
+                self.__remove(key)
+            self.__records[key] = IdempotentRecord(fingerprint)
+            return None
+
+    def wait(self, key: bytes, timeout: Optional[float]) -> Optional[IdempotentRecord]:
+        record = self.__records.get(key)
+        if record is None:
+            return None
+        record._done.wait(timeout)
+        return record if record.completed else None
+
+    def complete(self, key: bytes, status: int, headers: Dict[str, str], body: bytes, ttl: float):
+        with self.__lock:
+            record = self.__records.get(key)
+            if record is None:
+                return
+            record.headers = headers
+            record.body = body
+            size = len(key) + record.size
+            if size > self.max_bytes:
+                # Too large to be stored: the duplicates run again, like after a failure.
+                del self.__records[key]
+                record._done.set()
+                return
+            record.expires_at = monotonic() + ttl
+            record.status = status
+            self.__size += size
+            self.__evict()
+        record._done.set()
+
+    def release(self, key: bytes):
+        with self.__lock:
+            record = self.__records.get(key)
+            if record is None or record.completed:
+                return
+            del self.__records[key]
+        record._done.set()
+
+    def __remove(self, key: bytes):
+        record = self.__records.pop(key)
+        if record.completed:
+            self.__size -= len(key) + record.size
+
+    def __evict(self):
+        if self.__size <= self.max_bytes:
+            return
+        now = monotonic()
+        for key, record in list(self.__records.items()):
+            if record.completed and (record.expires_at <= now or self.__size > self.max_bytes):
+                self.__remove(key)
+
+
+def _default_scope(request: Request) -> Optional[str]:
+    headers = request.headers
+    credentials = headers.get('Authorization') or headers.get('X-Api-Key')
+    if credentials:
+        return 'credentials:' + credentials
+    remote_addr = request.remote_addr
+    return 'address:' + remote_addr if remote_addr else None
+
+
+class Idempotency(Middleware):
+    """
+        Deduplicates the retries of the requests sent with an `Idempotency-Key` header. Add it to the
+        resources that need it.
+
+        The first request with a key runs, and its status, headers and body bytes are stored for `ttl`
+        seconds. Duplicates arriving while it runs wait up to `wait_timeout` seconds for it (409 after),
+        later ones get the stored response, with an `Idempotent-Replayed: true` header, without calling
+        the handler. A key reused with a different request (method, path and query parameters, body)
+        gets a 422. Failed executions (exceptions and 5xx responses) are not stored and can be retried.
+
+        Keys are scoped by the `Authorization` or `X-Api-Key` header, or by the client address for the
+        anonymous requests (set `scope` behind a proxy, the clients share its address). `scope` overrides
+        it, requests without a scope aren't deduplicated. The stored body is projected with the `fields`
+        of the request, requests with a streamed body (`BodyStream`) can't be fingerprinted and get a 400.
+        The errors are raised as `HttpError`, sent with the App headers and error format.
+    """
+    def __init__(
+            self,
+            store: Optional[IdempotencyStore] = None,
+            ttl: float = 24 * 60 * 60,
+            methods: Iterable[str] = ('POST', 'PUT', 'PATCH'),
+            header_name: str = 'Idempotency-Key',
+            required: bool = False,
+            wait_timeout: Optional[float] = 30.0,
+            max_key_length: int = 255,
+            scope: Callable[[Request], Optional[str]] = _default_scope
+    ):
+        self.store = store if store is not None else MemoryIdempotencyStore()
+        self.ttl = ttl
+        self.methods = frozenset(method.upper() for method in methods)
+        self.header_name = header_name.title()
+        self.required = required
+        self.wait_timeout = wait_timeout
+        self.max_key_length = max_key_length
+        self.scope = scope
+
+    @staticmethod
+    def fingerprint(request: Request) -> bytes:
+        """Digest of what makes two requests the same one."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(request.method.encode())
+        for part in (request.path_params, request.params):
+            digest.update(b'\x00' + dumps(sorted(part.items())))
+        digest.update(b'\x00' + dumps(request.body))
+        return digest.digest()
+
+    def around(self, request: Request, call_next: Endpoint) -> Response:
+        if request.method not in self.methods:
+            return call_next(request)
+        idempotency_key = request.headers.get(self.header_name)
+        if not idempotency_key:
+            if self.required:
+                raise HttpError(400, f'The {self.header_name} header is required.')
+            return call_next(request)
+        if len(idempotency_key) > self.max_key_length:
+            raise HttpError(400, f'The {self.header_name} header is too long.')
+        if getattr(request.body, 'streamed', False):
+            raise HttpError(400, f'The {self.header_name} header is not supported with a streamed body.')
+        scope = self.scope(request)
+        if not scope:
+            # Without a scope, one client's stored response could be replayed to another one.
+            return call_next(request)
+
+        key = hashlib.blake2b(f'{scope}\x00{idempotency_key}'.encode(), digest_size=16).digest()
+        fingerprint = self.fingerprint(request)
+        deadline = None if self.wait_timeout is None else monotonic() + self.wait_timeout
+        store = self.store
+        while True:
+            record = store.reserve(key, fingerprint)
+            if record is None:
+                break
+            if record.fingerprint != fingerprint:
+                raise HttpError(422, f'The {self.header_name} was used by a different request.')
+            if not record.completed:
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise HttpError(409, f'A request with this {self.header_name} is in progress.')
+                record = store.wait(key, remaining)
+                if record is None:
+                    continue
+            headers = dict(record.headers)
+            headers['Idempotent-Replayed'] = 'true'
+            return Response(record.status, headers, record.body)
+
+        try:
+            response = call_next(request)
+            if response.streamed or response.status >= 500:
+                store.release(key)
+                return response
+            if request.fields is not None and response.fields is None and response.status < 400:
+                # The App can't project the stored bytes.
+                response = response.with_fields(request.fields)
+            body = b''.join(response.get_body_bytes())
+        except BaseException:
+            store.release(key)
+            raise
+        headers = dict(response.headers)
+        store.complete(key, response.status, headers, body, self.ttl)
+        return Response(response.status, headers, body)
+
+
+__all__ = ['Idempotency', 'IdempotencyStore', 'MemoryIdempotencyStore', 'IdempotentRecord']
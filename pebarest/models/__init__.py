@@ -1,5 +1,6 @@
 from .request import Request
-from .response import Response, DefaultErrorResponse
+from .response import Response, StreamingResponse, DefaultErrorResponse
 from .resource import Resource, resource
 from .http import HttpMethods, http_methods_list
 from .base_model import BaseModel
+from .body_stream import BodyStream
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, Union, List, Dict, Set, get_origin, get_args, Optional
+from typing import Any, Union, List, Dict, Set, Iterable, Iterator, Tuple, get_origin, get_args, Optional
 import collections.abc
 
 from pebarest.exceptions import AttrTypeError, AttrListTypeError, AttrMissingError
@@ -38,6 +38,19 @@ class BaseModel(JsonClass):
             if issubclass(hierarchical_class, BaseModel):
                 cls.__annotations__.update(hierarchical_class.__annotations__)
 
+    def __reduce__(self):
+        # `__dict__` returns a copy, the default pickling would restore an empty model.
+        return self.__class__._restore, ({attr_name: getattr(self, attr_name) for attr_name in self.__attrs},)
+
+    @classmethod
+    def _restore(cls, fields: Dict[str, Any]) -> 'BaseModel':
+        """Rebuilds a pickled model from its validated fields, without validating them again."""
+        model = cls.__new__(cls)
+        model.__attrs = tuple(fields)
+        for attr_name, value in fields.items():
+            setattr(model, attr_name, value)
+        return model
+
     def __iter__(self):
         # TODO: ISSO PODERIA SER FEITO DE FORMA MAIS OTIMIZADA
         yield from self.to_dict().items()
@@ -192,6 +205,16 @@ class BaseModel(JsonClass):
 
         return {"type": "object"}
 
+    def iter_fields(self, names: Iterable[str]) -> Iterator[Tuple[str, Any]]:
+        """
+            Yields the (name, value) pairs of the given attributes only, the others aren't read.
+        """
+        attrs = self.__attrs
+        for attr_name in names:
+            if attr_name in attrs:
+                attr = getattr(self, attr_name)
+                yield attr_name, str(attr) if type(attr) is datetime else attr
+
     def to_dict(self) -> dict:
         json_object = {}
         for attr_name in self.__attrs:
@@ -0,0 +1,244 @@
+import codecs
+import json
+
+from typing import Any, Dict, Generic, Iterable, Iterator, List, Optional, TypeVar
+
+from pebarest.exceptions import AttrMissingError, AttrTypeError, AttrListTypeError
+from pebarest.models.response import DefaultErrorResponse
+
+
+T = TypeVar("T")
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl', 'application/x-jsonlines')
+
+_WHITESPACE = ' \t\n\r'
+
+
+class BodyStream(Generic[T]):
+    """
+    Request body parsed while the handler iterates it, instead of loaded whole before the handler runs.
+    Annotate the handler request with `Request[BodyStream[Model]]` to receive validated `Model` instances:
+
+        def post(self, request: Request[BodyStream[Order]]):
+            for order in request.body:
+                ...
+            return {"errors": request.body.errors}
+
+    NDJSON bodies (`application/x-ndjson`) are read line by line, other bodies must be a top-level JSON
+    array, read item by item. The body is read from `wsgi.input` in `chunk_size` reads, the memory
+    stays bounded by the size of one record: records over `max_record_size` bytes are rejected.
+
+    Invalid records are skipped and reported in `errors`, with their `line` (NDJSON) or `index` (array),
+    up to `max_errors` of them; `error_count` counts them all. A JSON syntax error inside an array can't
+    be recovered from, it ends the iteration.
+    """
+    streamed = True
+    model: Optional[type] = None
+    chunk_size: int = 64 * 1024
+    max_record_size: int = 1024 * 1024
+    max_errors: int = 100
+
+    def __class_getitem__(cls, model):
+        if isinstance(model, TypeVar):
+            return super().__class_getitem__(model)
+        cached = _parametrized.get((cls, model))
+        if cached is None:
+            cached = _parametrized[(cls, model)] = type(f'{cls.__name__}[{model.__name__}]', (cls,), {'model': model})
+        return cached
+
+    def __init__(self, records: Iterator[tuple], position_name: str = 'index'):
+        """`records` yields (position, decoded record or the exception of an invalid one)."""
+        self.errors: List[Dict[str, Any]] = []
+        self.error_count = 0
+        self.count = 0
+        self.position_name = position_name
+        self.__records = records
+
+    @classmethod
+    def from_environ(cls, environ: dict) -> 'BodyStream[T]':
+        stream = environ['wsgi.input']
+        length = environ.get('CONTENT_LENGTH')
+        if length:
+            remaining = int(length)
+        else:
+            remaining = -1 if environ.get('wsgi.input_terminated') else 0
+        content_type = environ.get('CONTENT_TYPE', '').partition(';')[0].strip().lower()
+        chunks = _read_chunks(stream, remaining, cls.chunk_size)
+        if content_type in NDJSON_CONTENT_TYPES:
+            return cls(_ndjson_records(chunks, cls.max_record_size), 'line')
+        return cls(_array_records(chunks, cls.max_record_size))
+
+    @classmethod
+    def from_items(cls, items: Optional[Iterable[Any]]) -> 'BodyStream[T]':
+        """Streams already decoded items, e.g. the body of a batch sub-request."""
+        if items is None or isinstance(items, dict):
+            items = []
+        return cls(((index, item) for index, item in enumerate(items)))
+
+    def __iter__(self) -> Iterator[T]:
+        model = self.model
+        for position, record in self.__records:
+            if isinstance(record, Exception):
+                self._error(position, str(record))
+                continue
+            if model is None:
+                self.count += 1
+                yield record
+                continue
+            if not isinstance(record, dict):
+                self._error(position, 'Expected a JSON object.')
+                continue
+            try:
+                item = model(**record)
+            except AttrMissingError as e:
+                self._add_error(DefaultErrorResponse.attr_missing_error(e), position)
+                continue
+            except AttrTypeError as e:
+                self._add_error(DefaultErrorResponse.attr_type_error(e), position)
+                continue
+            except (AttrListTypeError, TypeError, ValueError) as e:
+                self._error(position, str(e) or type(e).__name__)
+                continue
+            self.count += 1
+            yield item
+
+    def _error(self, position, message: str):
+        self._add_error(DefaultErrorResponse(message), position)
+
+    def _add_error(self, error: dict, position):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            error[self.position_name] = position
+            self.errors.append(error)
+
+
+_parametrized: Dict[tuple, type] = {}
+
+
+def _ndjson_records(chunks: Iterator[bytes], max_record_size: int) -> Iterator[tuple]:
+    buffer = b''
+    line_number = 0
+    skipping = False
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                break
+            line = buffer[start:end]
+            start = end + 1
+            line_number += 1
+            if skipping:
+                skipping = False
+                continue
+            if line.strip():
+                yield line_number, _decode_line(line, max_record_size)
+        buffer = buffer[start:]
+        if len(buffer) > max_record_size:
+            if not skipping:
+                yield line_number + 1, ValueError(f'The record is larger than {max_record_size} bytes.')
+                skipping = True
+            buffer = b''
+    if buffer.strip() and not skipping:
+        yield line_number + 1, _decode_line(buffer, max_record_size)
+
+
+def _array_records(chunks: Iterator[bytes], max_record_size: int) -> Iterator[tuple]:
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    index = 0
+    started = False
+    expect_value = True
+    exhausted = False
+    chunks = iter(chunks)
+
+    def fill() -> bool:
+        nonlocal buffer, position, exhausted
+        if exhausted:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            buffer = buffer[position:] + utf8.decode(b'', final=True)
+        else:
+            buffer = buffer[position:] + utf8.decode(chunk)
+        position = 0
+        return True
+
+    try:
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position >= len(buffer):
+                if not fill():
+                    if started or index:
+                        yield index, ValueError('The JSON array is not closed.')
+                    return
+                continue
+            character = buffer[position]
+            if not started:
+                if character != '[':
+                    yield index, ValueError('The body must be a JSON array.')
+                    return
+                started = True
+                position += 1
+                continue
+            if character == ']' and (not expect_value or index == 0):
+                return
+            if not expect_value:
+                if character != ',':
+                    yield index, ValueError("Expected ',' or ']' between the array items.")
+                    return
+                expect_value = True
+                position += 1
+                continue
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                # A value ending with the buffer may continue in the next chunk, e.g. a number.
+                complete = end < len(buffer) or exhausted
+            except json.JSONDecodeError as e:
+                record, complete = e, exhausted
+            if not complete:
+                if len(buffer) - position > max_record_size:
+                    yield index, ValueError(f'The record is larger than {max_record_size} bytes.')
+                    return
+                fill()
+                continue
+            if isinstance(record, json.JSONDecodeError):
+                yield index, ValueError(f'Invalid JSON: {record.msg}.')
+                return
+            yield index, record
+            index += 1
+            position = end
+            expect_value = False
+    except UnicodeDecodeError:
+        yield index, ValueError('The body is not valid UTF-8.')
+
+
+
+def _decode_line(line: bytes, max_record_size: int):
+    if len(line) > max_record_size:
+        return ValueError(f'The record is larger than {max_record_size} bytes.')
+    try:
+        return json.loads(line)
+    except UnicodeDecodeError:
+        return ValueError('The record is not valid UTF-8.')
+    except json.JSONDecodeError as e:
+        return ValueError(f'Invalid JSON: {e.msg}.')
+
+
+def _read_chunks(stream, remaining: int, chunk_size: int) -> Iterator[bytes]:
+    """Reads `remaining` bytes from the stream, up to the end of the stream when negative."""
+    while remaining:
+        chunk = stream.read(chunk_size if remaining < 0 else min(chunk_size, remaining))
+        if not chunk:
+            return
+        if remaining > 0:
+            remaining -= len(chunk)
+        yield chunk
+
+
+__all__ = ['BodyStream', 'NDJSON_CONTENT_TYPES']
@@ -1,7 +1,10 @@
 import json
 
-from typing import Dict, Generic, TypeVar, Optional
-from urllib.parse import parse_qs
+from typing import Dict, Generic, TypeVar, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pebarest.utils.json import Projection
+    from pebarest.utils.pool import Pool
 
 
 DEFAULT_HEADERS = [
@@ -15,23 +18,85 @@ DEFAULT_HEADERS = [
 
 T = TypeVar("T")
 
+# Sparse fieldset of the request, set by the App when field projection is enabled.
+FIELDS_ENVIRON_KEY = 'pebarest.fields'
+
+_NO_POOLS: Dict[str, 'Pool'] = {}
+
 
 class Request(Generic[T]):
-    headers: dict
-    _headers: dict
-    params: dict
+    """
+    The headers and the query parameters are parsed from the environ on first access.
+    `fields` is the projection the App applies to the response body, None when there's none.
+    Middlewares can still attach their own attributes (`request.user = ...`): the instance dictionary is
+    only allocated by the requests that use one.
+    """
+    __slots__ = ('method', 'body', 'path_params', 'client_info', 'pools', 'fields', '_leases', '_environ',
+                 '_parsed_headers', '_params', '__dict__')
+    method: str
     body: T
     path_params: Dict[str, str]
-    client_info: Optional[dict] = None
+    client_info: Optional[dict]
+    pools: Dict[str, 'Pool']
+    fields: Optional['Projection']
 
-    def __init__(self, environ: dict, body_type: type=None, client_info: dict = None):
-        self.headers, self._headers = self.parse_headers(environ)
+    def __init__(self, environ: dict, body_type: type=None, client_info: dict = None,
+                 path_params: Dict[str, str] = None):
+        self.method = environ.get('REQUEST_METHOD', 'GET')
+        self._environ = environ
+        self._parsed_headers = None
+        self._params = None
 
-        parsed_body = self._parse_body(environ)
-        self.body = body_type(**parsed_body) if body_type else parsed_body
-        self.params = self._parse_params(environ)
-        self.path_params: Dict[str, str] = {}
+        if body_type is not None and getattr(body_type, 'streamed', False):
+            # Streamed bodies (BodyStream) are read while the handler iterates them.
+            self.body = body_type.from_environ(environ)
+        else:
+            parsed_body = self._parse_body(environ)
+            self.body = body_type(**parsed_body) if body_type else parsed_body
+        self.path_params = path_params if path_params is not None else {}
         self.client_info = client_info
+        self.pools = _NO_POOLS
+        self.fields = environ.get(FIELDS_ENVIRON_KEY)
+        self._leases = None
+
+    @property
+    def remote_addr(self) -> Optional[str]:
+        """Client address seen by the server (`REMOTE_ADDR`), None for the requests built without an environ."""
+        environ = self._environ
+        return environ.get('REMOTE_ADDR') if environ is not None else None
+
+    @property
+    def headers(self) -> dict:
+        parsed_headers = self._parsed_headers
+        if parsed_headers is None:
+            parsed_headers = self._parsed_headers = self.parse_headers(self._environ)
+        return parsed_headers[0]
+
+    @headers.setter
+    def headers(self, headers: dict):
+        self._parsed_headers = (headers, self._headers)
+
+    @property
+    def _headers(self) -> dict:
+        parsed_headers = self._parsed_headers
+        if parsed_headers is None:
+            parsed_headers = self._parsed_headers = self.parse_headers(self._environ)
+        return parsed_headers[1]
+
+    @_headers.setter
+    def _headers(self, headers: dict):
+        self._parsed_headers = (self.headers, headers)
+
+    @property
+    def params(self) -> dict:
+        params = self._params
+        if params is None:
+            params = self._params = self._parse_params(self._environ)
+        return params
+
+    @params.setter
+    def params(self, params: dict):
+        self._params = params
 
     @staticmethod
     def parse_headers(environ):
@@ -47,10 +112,66 @@ class Request(Generic[T]):
                     custom_headers[header_name.title()] = value
         return custom_headers, default_headers
 
+    @classmethod
+    def from_parts(cls, method: str, headers: Optional[dict] = None, body=None, body_type: type = None,
+                   params: Optional[dict] = None, client_info: dict = None) -> 'Request':
+        """Builds a request without a WSGI environ, e.g. for the sub-requests of a batch."""
+        request = cls.__new__(cls)
+        request.method = method
+        request._environ = None
+        request._parsed_headers = cls.split_headers(headers or {})
+        if body_type is not None and getattr(body_type, 'streamed', False):
+            request.body = body_type.from_items(body)
+        else:
+            if body is None:
+                body = {}
+            request.body = body_type(**body) if body_type else body
+        request._params = params or {}
+        request.path_params = {}
+        request.client_info = client_info
+        request.pools = _NO_POOLS
+        request.fields = None
+        request._leases = None
+        return request
+
+    def lease(self, name: str):
+        """
+        Acquires an object of the App pool `name` for this request, e.g. a database connection.
+        The same object is returned for the whole request and released after the handler returns.
+        """
+        leases = self._leases
+        if leases is None:
+            leases = self._leases = {}
+        elif name in leases:
+            return leases[name]
+        item = leases[name] = self.pools[name].acquire()
+        return item
+
+    def release_leases(self):
+        leases, self._leases = self._leases, None
+        for name, item in leases.items():
+            self.pools[name].release(item)
+
+    @staticmethod
+    def split_headers(headers: dict):
+        """Same as `parse_headers`, for a dictionary of header names and values."""
+        custom_headers = {}
+        default_headers = {}
+        for name, value in headers.items():
+            header_name = name.upper().replace('_', '-')
+            if header_name in DEFAULT_HEADERS:
+                default_headers[header_name.title()] = value
+            else:
+                custom_headers[header_name.title()] = value
+        return custom_headers, default_headers
+
     @staticmethod
     def _parse_params(environ):
         """Convert a query string to a dictionary."""
         query_string = environ.get('QUERY_STRING', '')
+        if not query_string:
+            return {}
+        from urllib.parse import parse_qs
         return {key: value[0] if len(value) == 1 else value
                 for key, value in parse_qs(query_string).items()}
 
@@ -67,4 +188,4 @@ class Request(Generic[T]):
         return {}
 
 
-__all__ = ['Request']
+__all__ = ['Request', 'FIELDS_ENVIRON_KEY']
@@ -1,46 +1,175 @@
-from typing import get_type_hints, get_args, Optional, Dict, Callable
+from time import perf_counter_ns
+from typing import get_type_hints, get_args, Optional, Dict, Callable, List, Iterable, Tuple, TYPE_CHECKING
 
 from pebarest.models.request import Request
 from pebarest.models.response import Response
 from pebarest.exceptions import MethodNotAllowedError
 from pebarest.models.http import HttpMethods, http_methods_list
+from pebarest.middleware.base_middleware import compile_chain
+from pebarest.utils.json import Projection
+from pebarest.utils.offload import CPU_BOUND_ATTRIBUTE
+
+if TYPE_CHECKING:
+    from pebarest.debug.timing import TimedRequest
+    from pebarest.utils.offload import ProcessOffloader
+    from pebarest.utils.pool import Pool
 
 
 class Resource:
-    __map_methods: Dict[str, Callable]
+    __map_methods: Optional[Dict[str, Callable]]
     __method_body_type: Dict[str, Optional[type]]
+    __used_methods: Dict[str, Callable]
+    __plan: Dict[str, Tuple[Callable, Optional[type]]]
+    __chain: Callable[[Request], Response]
+    __request_class: type
     headers: Dict[str, str]
+    middlewares: List = ()
     auth_handler = None
+    pools: Dict[str, 'Pool'] = {}
+    offloader: Optional['ProcessOffloader'] = None
 
     def __init__(self, default_headers: Optional[Dict[str, str]] = None):
-        self.__map_methods = {}
+        # The handlers and body types are resolved by `freeze`, not on construction.
+        self.__map_methods = None
         self.__method_body_type = {}
-
-        for method in http_methods_list:
-            handler = getattr(self, method)
-            self.__map_methods[method] = handler
-            annotations = get_type_hints(handler)
-            request_type = annotations.get('request')
-
-            if request_type:
-                args = get_args(request_type)
-                self.__method_body_type[method] = args[0] if args else None
-            else:
-                self.__method_body_type[method] = None
+        self.__used_methods = {}
+        self.__plan = {}
 
         self.headers = default_headers or {}
+        self.middlewares = list(self.middlewares)
+        self.__app_middlewares = ()
+        self.__timed = False
+        self.__request_class = Request
+        self.__chain = compile_chain(self.middlewares, self.handle)
 
     def __call__(self, environ: dict, path_params: Dict[str, str] = None) -> Response:
-        body_response, status_code = None, 200
-        method = environ['REQUEST_METHOD'].lower()
-        request = Request(environ, self.__method_body_type[method])
+        try:
+            _, body_type = self.__plan[environ['REQUEST_METHOD']]
+        except KeyError:
+            _, body_type = self.__plan_entry(environ['REQUEST_METHOD'])
+        request = self.__request_class(environ, body_type, None, path_params)
+        request.pools = self.pools
+        try:
+            return self.__chain(request)
+        finally:
+            if request._leases is not None:
+                request.release_leases()
+
+    def dispatch(self, method: str, path_params: Dict[str, str] = None, headers: Optional[dict] = None,
+                 body=None, params: Optional[dict] = None, fields: Optional[Projection] = None) -> Response:
+        """
+            Same as calling the resource, for requests that don't come from a WSGI environ,
+            e.g. the sub-requests of a batch. `fields` is the projection the caller applies to the response.
+        """
+        try:
+            _, body_type = self.__plan[method]
+        except KeyError:
+            _, body_type = self.__plan_entry(method)
+        request = self.__request_class.from_parts(method, headers, body, body_type, params)
         request.path_params = path_params or {}
+        request.fields = fields
+        request.pools = self.pools
+        try:
+            return self.__chain(request)
+        finally:
+            if request._leases is not None:
+                request.release_leases()
+
+    def __plan_entry(self, method: str) -> Tuple[Callable, Optional[type]]:
+        if self.__map_methods is None:
+            self.freeze()
+            if method in self.__plan:
+                return self.__plan[method]
+        raise MethodNotAllowedError(method)
+
+    def freeze(self):
+        """
+            Resolves the handler and body model of every method once, keyed by the `REQUEST_METHOD`
+            value. Runs when the App is frozen, or on the first request of a standalone resource.
+        """
+        map_methods, method_body_type, used_methods, plan = {}, {}, {}, {}
+        for method in http_methods_list:
+            handler = getattr(self, method)
+            map_methods[method] = handler
+            body_type = None
+            # Methods set on the instance come from `from_anonymous_object`.
+            if method in self.__dict__ or getattr(self.__class__, method) is not getattr(Resource, method):
+                used_methods[method] = handler
+                request_type = get_type_hints(handler).get('request')
+                args = get_args(request_type) if request_type else ()
+                body_type = args[0] if args else None
+            method_body_type[method] = body_type
+            options = getattr(handler, CPU_BOUND_ATTRIBUTE, None)
+            if options is not None:
+                if method in self.__dict__:
+                    raise TypeError(f"The cpu_bound '{method}' handler must be defined on the resource class.")
+                plan[method.upper()] = (self.__offloaded(method, options.timeout), body_type)
+            else:
+                plan[method.upper()] = (handler, body_type)
+
+        self.__method_body_type = method_body_type
+        self.__used_methods = used_methods
+        self.__plan = plan
+        self.__map_methods = map_methods
+
+    def __offloaded(self, method: str, timeout: Optional[float]) -> Callable:
+        resource_class = type(self)
+
+        def offloaded(request: Request):
+            from pebarest.utils.offload import RequestSnapshot, default_offloader
+            offloader = self.offloader or default_offloader()
+            return offloader.run(resource_class, method, RequestSnapshot.of(request), timeout)
+        return offloaded
+
+    def add_middleware(self, middleware):
+        """
+            Adds a middleware that runs only for this resource, inside the App level ones.
+        """
+        self.middlewares.append(middleware)
+        self.compile_middlewares(self.__app_middlewares, self.__timed)
+
+    def compile_middlewares(self, app_middlewares: Iterable = (), timed: bool = False):
+        """
+            Composes the App and resource middlewares around `handle` into a single call chain.
+            When `timed`, the request stages are recorded for the `Server-Timing` header.
+        """
+        self.__app_middlewares = tuple(app_middlewares)
+        self.__timed = timed
+        self.__request_class = Request
+        if timed:
+            from pebarest.debug.timing import TimedRequest
+            self.__request_class = TimedRequest
+        endpoint = self.handle_timed if timed else self.handle
+        self.__chain = compile_chain([*self.__app_middlewares, *self.middlewares], endpoint)
+
+    def handle(self, request: Request) -> Response:
+        """
+            Authenticates the request, calls the method handler and converts its return into a Response.
+        """
+        if self.auth_handler:
+            request.client_info = self.auth_handler.authenticate(request)
+
+        return self.to_response(self.__plan[request.method][0](request))
 
+    def handle_timed(self, request: 'TimedRequest') -> Response:
+        """
+            Same as `handle`, recording the auth and handler stages.
+        """
+        timings = request.timings
+        started = perf_counter_ns()
         if self.auth_handler:
             request.client_info = self.auth_handler.authenticate(request)
+            started = timings.record('auth', started)
 
-        call_return = self.__map_methods[method](request)
+        call_return = self.__plan[request.method][0](request)
+        timings.record('handler', started)
+        return self.to_response(call_return)
 
+    def to_response(self, call_return) -> Response:
+        """
+            Converts a handler return (Response, body or (body, status_code) tuple) into a Response.
+        """
+        body_response, status_code = None, 200
         if isinstance(call_return, Response):
             return call_return
         if isinstance(call_return, (dict, str, int, float, bool, list)):
@@ -54,14 +183,14 @@ class Resource:
 
     @property
     def used_methods(self) -> Dict[str, Callable]:
-        used_methods = {}
-        for method, handler in self.__map_methods.items():
-            if id(getattr(self.__class__, method)) != id(getattr(Resource, method)):
-                used_methods[method] = handler
-        return used_methods
+        if self.__map_methods is None:
+            self.freeze()
+        return self.__used_methods
 
     @property
     def method_body_type(self) -> Dict[str, Optional[type]]:
+        if self.__map_methods is None:
+            self.freeze()
         return self.__method_body_type
 
     def get(self, request: Request) -> Response:
@@ -1,24 +1,90 @@
-from typing import Optional, Union, List
+from typing import Dict, Iterable, Optional, Union, List
 
 from pebarest.exceptions import AttrMissingError, AttrTypeError
-from pebarest.utils import dumps, get_json_str_type_from_type
+from pebarest.utils import dumps, get_json_str_type_from_type, parse_fields, Projection
+
+
+_status_lines: Dict[int, str] = {}
 
 
 class Response:
+    __slots__ = ('status', 'headers', 'body', 'fields')
+    # Streamed responses send the chunks of `stream` instead of the serialized body.
+    streamed = False
     status: int
     headers: dict
-    body: Optional[Union[dict, str]] = None
-
-    def __init__(self, status: int, headers: dict, body: Union[dict, str]=None):
+    body: Optional[Union[dict, str, bytes]]
+    fields: Optional[Projection]
+
+    def __init__(self, status: int, headers: dict, body: Union[dict, str, bytes]=None,
+                 fields: Optional[Union[str, Projection]]=None):
+        """
+        :param fields: Keeps only these fields of the body, as "id,name,address.city" or a projection tree.
+        """
         self.status = status
         self.headers = headers
         self.body = body
+        self.fields = parse_fields(fields) if isinstance(fields, str) else fields
 
     def get_body_bytes(self) -> List[bytes]:
-        return [dumps(self.body)]
+        """Serializes the body, bytes bodies are sent as they are."""
+        if isinstance(self.body, bytes):
+            return [self.body]
+        return [dumps(self.body, self.fields)]
+
+    def with_fields(self, fields: Optional[Projection]) -> 'Response':
+        """
+        Copy of the response keeping only these fields of the body. The response itself is left unchanged,
+        handlers may return the same Response object to every request.
+        """
+        from copy import copy
+        response = copy(self)
+        response.fields = fields
+        return response
 
     def get_status(self):
-        return f"{self.status} "
+        status_line = _status_lines.get(self.status)
+        if status_line is None:
+            status_line = _status_lines[self.status] = f"{self.status} "
+        return status_line
+
+
+def prepare_status_lines(statuses: Iterable[int]):
+    """Builds the status lines of these statuses ahead of the requests, e.g. before forking workers."""
+    for status in statuses:
+        if status not in _status_lines:
+            _status_lines[status] = f"{status} "
+
+
+_encoded_errors: Dict[tuple, bytes] = {}
+
+
+def encoded_error(error_format: type, *args, **kwargs) -> bytes:
+    """
+    Serialized body of a constant error, built once per error format class and arguments.
+    Only use it for bodies from a bounded set, each distinct one stays cached.
+    """
+    key = (error_format, args, tuple(kwargs.items()))
+    body = _encoded_errors.get(key)
+    if body is None:
+        body = _encoded_errors[key] = dumps(error_format(*args, **kwargs))
+    return body
+
+
+class StreamingResponse(Response):
+    """
+    Response whose body is an iterable of bytes chunks, sent as they are produced instead of serialized.
+    """
+    __slots__ = ()
+    streamed = True
+
+    def stream(self, environ: dict) -> Iterable[bytes]:
+        """The WSGI body iterable, the server calls its `close` method if it has one."""
+        return self.body
+
+    def get_body_bytes(self) -> List[bytes]:
+        """Reads the whole stream, for the callers that need the complete body."""
+        return [b''.join(self.stream({}))]
 
 
 class ErrorResponse(dict):
@@ -52,4 +118,5 @@ class DefaultErrorResponse(ErrorResponse):
         return cls(f"Attribute '{e.attr_name}' must be a {attr_type}.", **kwargs)
 
 
-__all__ = ['Response', 'ErrorResponse', 'DefaultErrorResponse']
+__all__ = ['Response', 'StreamingResponse', 'ErrorResponse', 'DefaultErrorResponse', 'encoded_error',
+           'prepare_status_lines']
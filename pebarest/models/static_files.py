@@ -0,0 +1,252 @@
+import mimetypes
+import os
+import stat
+import threading
+
+from email.utils import formatdate, parsedate_to_datetime
+from time import monotonic
+from typing import Dict, Iterable, Optional, Tuple
+
+from pebarest.exceptions import NotFoundError
+from pebarest.models.request import Request
+from pebarest.models.resource import Resource
+from pebarest.models.response import Response, StreamingResponse
+
+
+class FileResponse(StreamingResponse):
+    """
+    Streams `length` bytes of a file from `offset`, the whole file when `length` is None.
+
+    Whole files go through the server `wsgi.file_wrapper`, which sends them with `os.sendfile` when it
+    supports it (e.g. gunicorn). Ranges and servers without a file wrapper read `chunk_size` bytes at a
+    time, the file is never loaded whole.
+    """
+    __slots__ = ('path', 'offset', 'length', 'chunk_size')
+
+    def __init__(self, status: int, headers: Dict[str, str], path: str, offset: int = 0,
+                 length: Optional[int] = None, chunk_size: int = 256 * 1024):
+        super().__init__(status, headers)
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.chunk_size = chunk_size
+
+    def stream(self, environ: dict) -> Iterable[bytes]:
+        file = open(self.path, 'rb')
+        try:
+            if self.offset:
+                file.seek(self.offset)
+            file_wrapper = environ.get('wsgi.file_wrapper')
+            if file_wrapper is not None and self.length is None:
+                return file_wrapper(file, self.chunk_size)
+            return _FileChunks(file, self.length, self.chunk_size)
+        except BaseException:
+            file.close()
+            raise
+
+
+class _FileChunks:
+    __slots__ = ('file', 'remaining', 'chunk_size')
+
+    def __init__(self, file, length: Optional[int], chunk_size: int):
+        self.file = file
+        self.remaining = length
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        remaining = self.remaining
+        if remaining is None:
+            chunk = self.file.read(self.chunk_size)
+        elif remaining > 0:
+            chunk = self.file.read(min(self.chunk_size, remaining))
+            self.remaining = remaining - len(chunk)
+        else:
+            chunk = b''
+        if not chunk:
+            self.close()
+            raise StopIteration
+        return chunk
+
+    def close(self):
+        self.file.close()
+
+
+class _FileInfo:
+    __slots__ = ('path', 'size', 'mtime', 'etag', 'last_modified', 'content_type')
+
+    def __init__(self, path: str, stat_result: os.stat_result, content_type: str):
+        self.path = path
+        self.size = stat_result.st_size
+        self.mtime = int(stat_result.st_mtime)
+        self.etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        self.last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.content_type = content_type
+
+
+class StaticFiles(Resource):
+    """
+    Serves the files of `directory`, mount it on a route ending with a `{path:path}` parameter:
+
+        app.add_route('/static/{path:path}', StaticFiles('public'))
+
+    Supports HEAD, single `Range` requests (206 and 416) and the `If-None-Match`, `If-Modified-Since`
+    and `If-Range` conditions (304). Paths resolving outside of `directory`, symbolic links included,
+    are answered with 404.
+
+    The file lookups (stat, ETag and MIME type) are cached for `stat_ttl` seconds, up to `cache_size` paths.
+    """
+    directory: str
+    index_file: Optional[str]
+    max_age: Optional[int]
+    chunk_size: int
+    stat_ttl: float
+    cache_size: int
+
+    def __init__(self, directory: str, path_param: str = 'path', index_file: Optional[str] = 'index.html',
+                 max_age: Optional[int] = 3600, chunk_size: int = 256 * 1024, stat_ttl: float = 1.0,
+                 cache_size: int = 1024):
+        super().__init__()
+        self.directory = os.path.realpath(directory)
+        if not os.path.isdir(self.directory):
+            raise ValueError(f"'{directory}' is not a directory.")
+        self.path_param = path_param
+        self.index_file = index_file
+        self.max_age = max_age
+        self.chunk_size = chunk_size
+        self.stat_ttl = stat_ttl
+        self.cache_size = cache_size
+        self.__files: Dict[str, Tuple[float, Optional[_FileInfo]]] = {}
+        self.__content_types: Dict[str, str] = {}
+        self.__lock = threading.Lock()
+
+    def get(self, request: Request) -> Response:
+        info = self.__file_info(request.path_params.get(self.path_param, ''))
+        headers = request.headers
+        if self.__not_modified(info, headers):
+            return Response(304, self.__headers(info), b'')
+
+        byte_range = self.__range(info, headers)
+        if byte_range is None:
+            response_headers = self.__headers(info)
+            response_headers['Content-Type'] = info.content_type
+            response_headers['Content-Length'] = str(info.size)
+            return FileResponse(200, response_headers, info.path, chunk_size=self.chunk_size)
+
+        start, end = byte_range
+        if start > end:
+            response_headers = self.__headers(info)
+            response_headers['Content-Range'] = f'bytes */{info.size}'
+            return Response(416, response_headers, b'')
+        response_headers = self.__headers(info)
+        response_headers['Content-Type'] = info.content_type
+        response_headers['Content-Length'] = str(end - start + 1)
+        response_headers['Content-Range'] = f'bytes {start}-{end}/{info.size}'
+        return FileResponse(206, response_headers, info.path, start, end - start + 1, self.chunk_size)
+
+    def head(self, request: Request) -> Response:
+        response = self.get(request)
+        # Keeps the headers of the GET response, Content-Length included, without opening the file.
+        return Response(response.status, response.headers, b'')
+
+    def clear_cache(self):
+        with self.__lock:
+            self.__files.clear()
+
+    def __file_info(self, relative_path: str) -> _FileInfo:
+        now = monotonic()
+        cached = self.__files.get(relative_path)
+        if cached is not None and cached[0] > now:
+            info = cached[1]
+        else:
+            info = self.__lookup(relative_path)
+            with self.__lock:
+                if len(self.__files) >= self.cache_size:
+                    self.__files.clear()
+                self.__files[relative_path] = (now + self.stat_ttl, info)
+        if info is None:
+            raise NotFoundError()
+        return info
+
+    def __lookup(self, relative_path: str) -> Optional[_FileInfo]:
+        if '\x00' in relative_path:
+            return None
+        path = os.path.realpath(os.path.join(self.directory, relative_path.lstrip('/')))
+        if path != self.directory and not path.startswith(self.directory + os.sep):
+            return None
+        try:
+            stat_result = os.stat(path)
+            if stat.S_ISDIR(stat_result.st_mode) and self.index_file:
+                path = os.path.join(path, self.index_file)
+                stat_result = os.stat(path)
+        except (OSError, ValueError):
+            return None
+        if not stat.S_ISREG(stat_result.st_mode):
+            return None
+        return _FileInfo(path, stat_result, self.__content_type(path))
+
+    def __content_type(self, path: str) -> str:
+        extension = os.path.splitext(path)[1].lower()
+        content_type = self.__content_types.get(extension)
+        if content_type is None:
+            content_type, encoding = mimetypes.guess_type('file' + extension)
+            if content_type is None or encoding is not None:
+                content_type = 'application/octet-stream'
+            elif content_type.startswith('text/'):
+                content_type += '; charset=utf-8'
+            self.__content_types[extension] = content_type
+        return content_type
+
+    def __headers(self, info: _FileInfo) -> Dict[str, str]:
+        headers = {'ETag': info.etag, 'Last-Modified': info.last_modified, 'Accept-Ranges': 'bytes'}
+        if self.max_age is not None:
+            headers['Cache-Control'] = f'public, max-age={self.max_age}'
+        return headers
+
+    @staticmethod
+    def __not_modified(info: _FileInfo, headers: dict) -> bool:
+        if_none_match = headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or any((tag[2:] if tag.startswith('W/') else tag) == info.etag for tag in tags)
+        if_modified_since = headers.get('If-Modified-Since')
+        if if_modified_since is not None:
+            try:
+                return info.mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def __range(info: _FileInfo, headers: dict) -> Optional[Tuple[int, int]]:
+        """
+            The (start, end) bytes of a single range request, with start > end when it can't be satisfied.
+            Returns None for full responses: no range, a multi-range or an invalid one, a stale If-Range.
+        """
+        header = headers.get('Range')
+        if not header or not header.startswith('bytes=') or ',' in header:
+            return None
+        if_range = headers.get('If-Range')
+        if if_range is not None and if_range != info.etag and if_range != info.last_modified:
+            return None
+        first, _, last = header[6:].strip().partition('-')
+        try:
+            if not first:
+                suffix = int(last)
+                if suffix <= 0:
+                    return 1, 0
+                return max(info.size - suffix, 0), info.size - 1
+            start = int(first)
+            end = int(last) if last else info.size - 1
+        except ValueError:
+            return None
+        if start > end:
+            return None
+        if start >= info.size:
+            return 1, 0
+        return start, min(end, info.size - 1)
+
+
+__all__ = ['StaticFiles', 'FileResponse']
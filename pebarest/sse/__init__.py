@@ -0,0 +1,2 @@
+from .event import Event, EventStream, encode_event
+from .hub import BroadcastHub, Subscription
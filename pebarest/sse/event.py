@@ -0,0 +1,133 @@
+import re
+
+from typing import AsyncIterator, Dict, Iterable, Iterator, Optional, Union, TYPE_CHECKING
+
+from pebarest.models.response import StreamingResponse
+from pebarest.utils.json import dumps
+
+if TYPE_CHECKING:
+    from pebarest.sse.hub import Subscription
+
+
+_LINE_BREAK = re.compile(r'\r\n|\r|\n')
+
+HEARTBEAT = b': heartbeat\n\n'
+
+
+def encode_event(data, event: Optional[str] = None, id: Optional[str] = None,
+                 retry: Optional[int] = None) -> bytes:
+    """
+    Encodes one event in the `text/event-stream` format. `data` is sent as it is when it's a
+    str or bytes, serialized to JSON otherwise. Multi-line data is split in `data:` lines.
+    """
+    lines = []
+    if id is not None:
+        id = str(id)
+        if _LINE_BREAK.search(id) or '\x00' in id:
+            raise ValueError('Event ids cannot contain line breaks or NULL characters.')
+        lines.append(f'id: {id}')
+    if event is not None:
+        if _LINE_BREAK.search(event):
+            raise ValueError('Event names cannot contain line breaks.')
+        lines.append(f'event: {event}')
+    if retry is not None:
+        lines.append(f'retry: {int(retry)}')
+    if isinstance(data, bytes):
+        text = data.decode('utf-8')
+    elif isinstance(data, str):
+        text = data
+    else:
+        text = dumps(data).decode('utf-8')
+    lines.extend('data: ' + line for line in _LINE_BREAK.split(text))
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+class Event:
+    """
+    An event encoded once, the same bytes are written to every subscriber.
+    """
+    __slots__ = ('id', 'event', 'data', 'encoded')
+
+    def __init__(self, data, event: Optional[str] = None, id: Optional[str] = None, retry: Optional[int] = None):
+        self.id = None if id is None else str(id)
+        self.event = event
+        self.data = data
+        self.encoded = encode_event(data, event, self.id, retry)
+
+
+class EventStream(StreamingResponse):
+    """
+    Server-Sent Events response. `source` is a hub `Subscription`, or an iterable of `Event`s or of
+    data to encode. While a subscription has no event for `heartbeat` seconds a comment line is
+    written, which keeps proxies from closing the connection and detects the gone clients.
+
+    WSGI servers iterate `stream`, blocking a thread per connection. Async servers iterate the
+    stream with `async for` (subscriptions made with `BroadcastHub.subscribe_async`).
+    """
+    __slots__ = ('heartbeat', 'retry')
+
+    def __init__(self, source: Union['Subscription', Iterable], heartbeat: Optional[float] = 15.0,
+                 retry: Optional[int] = None, headers: Optional[Dict[str, str]] = None):
+        response_headers = {
+            'Content-Type': 'text/event-stream; charset=utf-8',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        }
+        if headers:
+            response_headers.update(headers)
+        super().__init__(200, response_headers, source)
+        self.heartbeat = heartbeat
+        self.retry = retry
+
+    def stream(self, environ: dict) -> Iterator[bytes]:
+        return self.__iter__()
+
+    def get_body_bytes(self):
+        raise TypeError('An event stream has no complete body.')
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self.retry is not None:
+            yield f'retry: {int(self.retry)}\n\n'.encode('ascii')
+        source = self.body
+        if not hasattr(source, 'get'):
+            for item in source:
+                yield _encoded(item)
+            return
+        try:
+            while True:
+                event = source.get(self.heartbeat)
+                if event is None:
+                    if source.closed:
+                        return
+                    yield HEARTBEAT
+                else:
+                    yield event.encoded
+        finally:
+            source.close()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        if self.retry is not None:
+            yield f'retry: {int(self.retry)}\n\n'.encode('ascii')
+        source = self.body
+        if not hasattr(source, 'get_async'):
+            for item in source:
+                yield _encoded(item)
+            return
+        try:
+            while True:
+                event = await source.get_async(self.heartbeat)
+                if event is None:
+                    if source.closed:
+                        return
+                    yield HEARTBEAT
+                else:
+                    yield event.encoded
+        finally:
+            source.close()
+
+
+def _encoded(item) -> bytes:
+    return item.encoded if isinstance(item, Event) else encode_event(item)
+
+
+__all__ = ['Event', 'EventStream', 'encode_event']
@@ -0,0 +1,204 @@
+import os
+import threading
+
+from collections import deque
+from itertools import count
+from typing import Deque, Dict, Optional, Tuple, TYPE_CHECKING
+
+from pebarest.sse.event import Event, EventStream
+
+if TYPE_CHECKING:
+    import asyncio
+
+    from pebarest.models.request import Request
+
+
+class Subscription:
+    """
+    Bounded queue of the events published to a hub since the subscription. A subscriber whose queue
+    is full when an event arrives is dropped: it is closed and its stream ends, the client reconnects
+    with the `Last-Event-ID` header and gets the missed events from the hub history.
+    """
+    __slots__ = ('hub', 'max_queue', 'closed', 'dropped', '_queue', '_ready', '_loop', '_async_ready')
+    max_queue: int
+    closed: bool
+    dropped: bool
+
+    def __init__(self, hub: 'BroadcastHub', max_queue: int, loop: Optional['asyncio.AbstractEventLoop'] = None):
+        self.hub = hub
+        self.max_queue = max_queue
+        self.closed = False
+        self.dropped = False
+        self._queue: Deque[Event] = deque()
+        self._loop = loop
+        if loop is None:
+            self._ready = threading.Event()
+            self._async_ready = None
+        else:
+            import asyncio
+            self._ready = None
+            self._async_ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def _push(self, event: Event) -> bool:
+        """Queues the event, returns False when the subscriber is too slow and was dropped."""
+        if len(self._queue) >= self.max_queue:
+            self.dropped = True
+            self.closed = True
+            self._wake()
+            return False
+        self._queue.append(event)
+        self._wake()
+        return True
+
+    def _wake(self):
+        if self._loop is None:
+            self._ready.set()
+        else:
+            try:
+                self._loop.call_soon_threadsafe(self._async_ready.set)
+            except RuntimeError:
+                # The loop is closed, nobody is waiting anymore.
+                self.closed = True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """
+        Waits up to `timeout` seconds for the next event. Returns None on timeout and once closed,
+        the queued events are returned first.
+        """
+        queue, ready = self._queue, self._ready
+        while True:
+            if queue:
+                return queue.popleft()
+            if self.closed:
+                return None
+            ready.clear()
+            # An event pushed between the check and the clear has set the flag before it was cleared.
+            if queue or self.closed:
+                continue
+            if not ready.wait(timeout):
+                return queue.popleft() if queue else None
+
+    async def get_async(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """Same as `get`, for subscriptions made with `BroadcastHub.subscribe_async`."""
+        import asyncio
+        queue, ready = self._queue, self._async_ready
+        while True:
+            if queue:
+                return queue.popleft()
+            if self.closed:
+                return None
+            ready.clear()
+            if queue or self.closed:
+                continue
+            try:
+                await asyncio.wait_for(ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return queue.popleft() if queue else None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._wake()
+        self.hub.unsubscribe(self)
+
+
+class BroadcastHub:
+    """
+    In-process publish/subscribe hub for Server-Sent Events. `publish` encodes an event once and
+    queues the same bytes to every subscriber of the process, events don't cross worker processes.
+
+    The last `history` events are kept to resume the clients reconnecting with `Last-Event-ID`.
+    Events get increasing numeric ids unless published with their own.
+    """
+    max_queue: int
+    history: int
+
+    def __init__(self, max_queue: int = 100, history: int = 100):
+        if max_queue < 1 or history < 0:
+            raise ValueError('max_queue must be positive and history not negative.')
+        self.max_queue = max_queue
+        self.history = history
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, Subscription] = {}
+        self._snapshot: Tuple[Subscription, ...] = ()
+        self._history: Deque[Event] = deque(maxlen=self.history)
+        self._ids = count(1)
+        self.dropped = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, data, event: Optional[str] = None, id: Optional[str] = None) -> Event:
+        """Encodes the event once and queues it to every subscriber, returns the published `Event`."""
+        with self._lock:
+            published = Event(data, event, next(self._ids) if id is None else id)
+            self._history.append(published)
+            subscribers = self._snapshot
+        dropped = [subscription for subscription in subscribers if not subscription._push(published)]
+        if dropped:
+            with self._lock:
+                for subscription in dropped:
+                    self.__remove(subscription)
+                self.dropped += len(dropped)
+        return published
+
+    def subscribe(self, last_event_id: Optional[str] = None, max_queue: Optional[int] = None) -> Subscription:
+        """
+        Subscribes a thread-per-connection consumer. With `last_event_id`, the events published after
+        it are queued first, or the whole history when the id is no longer known.
+        """
+        return self.__subscribe(Subscription(self, max_queue or self.max_queue), last_event_id)
+
+    def subscribe_async(self, last_event_id: Optional[str] = None, max_queue: Optional[int] = None) -> Subscription:
+        """Same as `subscribe`, for a consumer running in the current asyncio event loop."""
+        import asyncio
+        subscription = Subscription(self, max_queue or self.max_queue, asyncio.get_running_loop())
+        return self.__subscribe(subscription, last_event_id)
+
+    def stream(self, request: 'Request', heartbeat: Optional[float] = 15.0, retry: Optional[int] = None) -> EventStream:
+        """Subscribes the request, resuming from its `Last-Event-ID` header, and returns its event stream."""
+        last_event_id = request.headers.get('Last-Event-Id') or request.params.get('lastEventId')
+        return EventStream(self.subscribe(last_event_id), heartbeat, retry)
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self.__remove(subscription)
+
+    def close(self):
+        """Closes every subscription, their streams end once their queued events are sent."""
+        with self._lock:
+            subscribers = self._snapshot
+            self._subscribers = {}
+            self._snapshot = ()
+        for subscription in subscribers:
+            subscription.closed = True
+            subscription._wake()
+
+    def __subscribe(self, subscription: Subscription, last_event_id: Optional[str]) -> Subscription:
+        with self._lock:
+            if last_event_id is not None:
+                missed = list(self._history)
+                for position, event in enumerate(missed):
+                    if event.id == last_event_id:
+                        missed = missed[position + 1:]
+                        break
+                for event in missed[-subscription.max_queue:]:
+                    subscription._queue.append(event)
+            self._subscribers[id(subscription)] = subscription
+            self._snapshot = tuple(self._subscribers.values())
+        return subscription
+
+    def __remove(self, subscription: Subscription):
+        if self._subscribers.pop(id(subscription), None) is not None:
+            self._snapshot = tuple(self._subscribers.values())
+
+
+__all__ = ['BroadcastHub', 'Subscription']
@@ -0,0 +1,39 @@
+"""
+Generates the unit tests of an application, as an explicit build step instead of at request time.
+
+    python -m pebarest.testing generate myapi:app
+    python -m pebarest.testing generate myapi:app --cases test_cases.json --output tests/test_api.py
+"""
+import argparse
+import json
+import sys
+
+from pebarest.utils.imports import import_string
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pebarest.testing')
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate = commands.add_parser('generate', help='Writes the generated unittest file of an application.')
+    generate.add_argument('app', help="The application, as 'module:attribute'.")
+    generate.add_argument('-c', '--cases', help='JSON file mapping routes and methods to the test payloads.')
+    generate.add_argument('-o', '--output', help='Output file (default: tests/test_api_generated.py).')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, '')
+    app = import_string(args.app)
+    test_cases = None
+    if args.cases:
+        with open(args.cases, encoding='utf-8') as f:
+            test_cases = json.load(f)
+
+    if not app.testing_generator:
+        print('The application has no testing generator.', file=sys.stderr)
+        return 1
+    app.testing_generator.generate(test_cases, args.output)
+    print(f"Tests written to {args.output or 'tests/test_api_generated.py'}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import atexit
+import base64
+import io
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+
+DEFAULT_CAPTURED_HEADERS = ('Content-Type', 'Accept', 'Accept-Encoding', 'User-Agent')
+
+
+class _RawLineFormatter(logging.Formatter):
+    def format(self, record):
+        return record.msg
+
+
+class TrafficCapture:
+    """
+    Writes a sampled fraction of the requests (method, path, query, selected headers, body) to an
+    append-only NDJSON file, rotated at `max_bytes` keeping `backup_count` old files. The lines are
+    written by a background thread. Only the `headers` listed are captured, so credentials stay out
+    of the file unless explicitly asked for.
+    """
+    path: str
+    sample_rate: float
+
+    def __init__(
+            self,
+            path: str = 'capture.ndjson',
+            sample_rate: float = 1.0,
+            headers: Iterable[str] = DEFAULT_CAPTURED_HEADERS,
+            max_bytes: int = 64 * 1024 * 1024,
+            backup_count: int = 5,
+            max_body_bytes: int = 1024 * 1024
+    ):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError('sample_rate must be between 0 and 1.')
+        self.path = path
+        self.sample_rate = sample_rate
+        self.headers = {'HTTP_' + name.upper().replace('-', '_'): name for name in headers}
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_body_bytes = max_body_bytes
+        self._queue = None
+        self._listener = None
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+        atexit.register(self.stop)
+
+    def start(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backup_count,
+                                          encoding='utf-8', delay=True)
+            handler.setFormatter(_RawLineFormatter())
+            self._queue = queue.SimpleQueue()
+            self._listener = QueueListener(self._queue, handler)
+            self._listener.start()
+
+    def stop(self):
+        with self._lock:
+            if self._listener is None:
+                return
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+
+    def _reset_after_fork(self):
+        self._queue = None
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def _capture_body(self, environ: dict) -> Optional[bytes]:
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return None
+        if length <= 0 or length > self.max_body_bytes:
+            return None
+        body = environ['wsgi.input'].read(length)
+        # The handler still needs to read the body.
+        environ['wsgi.input'] = io.BytesIO(body)
+        environ['CONTENT_LENGTH'] = str(len(body))
+        return body
+
+    def run(self, environ: dict, dispatch: Callable[[dict], Tuple[Optional[str], object]]):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return dispatch(environ)
+
+        record = {
+            "ts": round(time.time(), 3),
+            "method": environ.get('REQUEST_METHOD', 'GET'),
+            "path": environ.get('PATH_INFO', '/'),
+        }
+        query = environ.get('QUERY_STRING')
+        if query:
+            record["query"] = query
+        headers = {name: environ[key] for key, name in self.headers.items() if key in environ}
+        if 'CONTENT_TYPE' in environ and 'HTTP_CONTENT_TYPE' in self.headers:
+            headers['Content-Type'] = environ['CONTENT_TYPE']
+        if headers:
+            record["headers"] = headers
+        body = self._capture_body(environ)
+        if body:
+            try:
+                record["body"] = body.decode('utf-8')
+            except UnicodeDecodeError:
+                record["body_b64"] = base64.b64encode(body).decode('ascii')
+
+        route, response = dispatch(environ)
+        record["route"] = route
+        record["status"] = response.status
+        self.write(record)
+        return route, response
+
+    def write(self, record: dict):
+        if self._listener is None:
+            self.start()
+        line = json.dumps(record, separators=(',', ':'), ensure_ascii=False)
+        self._queue.put(logging.makeLogRecord({'msg': line}))
+
+
+def read_capture(*paths: str) -> Iterator[dict]:
+    """Yields the captured records of the given files, in order. Malformed lines are skipped."""
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if 'body_b64' in record:
+                    record['body'] = base64.b64decode(record.pop('body_b64'))
+                yield record
+
+
+def capture_files(path: str) -> list:
+    """Returns the rotated files of a capture ordered from the oldest to the newest."""
+    files = []
+    index = 1
+    while os.path.exists(f'{path}.{index}'):
+        files.append(f'{path}.{index}')
+        index += 1
+    files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+__all__ = ['TrafficCapture', 'read_capture', 'capture_files', 'DEFAULT_CAPTURED_HEADERS']
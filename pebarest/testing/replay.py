@@ -0,0 +1,159 @@
+"""
+Replays captured traffic in-process through `TestClient`.
+
+    python -m pebarest.testing.replay capture.ndjson --app myapi:app --output build_a.json
+    python -m pebarest.testing.replay capture.ndjson --app myapi:app --baseline build_a.json
+
+With --baseline the per-route timings and the status codes that differ from the baseline run are reported.
+"""
+import argparse
+import json
+import statistics
+import sys
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter_ns
+from typing import Dict, Iterable, List, Optional
+
+from pebarest.testing.capture import capture_files, read_capture
+from pebarest.testing.test_client import TestClient
+from pebarest.utils.imports import import_string
+
+
+class ReplayReport:
+    """Status and duration of every replayed request, in capture order."""
+    records: List[dict]
+    statuses: List[int]
+    durations_ns: List[int]
+
+    def __init__(self, records: List[dict], statuses: List[int], durations_ns: List[int]):
+        self.records = records
+        self.statuses = statuses
+        self.durations_ns = durations_ns
+
+    def routes(self) -> Dict[str, Dict[str, object]]:
+        grouped: Dict[str, List[int]] = {}
+        route_statuses: Dict[str, Dict[str, int]] = {}
+        for record, status, duration in zip(self.records, self.statuses, self.durations_ns):
+            route = f"{record['method']} {record.get('route') or record['path']}"
+            grouped.setdefault(route, []).append(duration)
+            counts = route_statuses.setdefault(route, {})
+            counts[str(status)] = counts.get(str(status), 0) + 1
+
+        routes = {}
+        for route, durations in sorted(grouped.items()):
+            durations.sort()
+            routes[route] = {
+                "count": len(durations),
+                "mean_us": round(statistics.fmean(durations) / 1000, 2),
+                "p50_us": round(durations[len(durations) // 2] / 1000, 2),
+                "p99_us": round(durations[min(len(durations) - 1, int(len(durations) * 0.99))] / 1000, 2),
+                "max_us": round(durations[-1] / 1000, 2),
+                "statuses": route_statuses[route],
+            }
+        return routes
+
+    def captured_status_mismatches(self) -> List[dict]:
+        """Requests whose replayed status differs from the status recorded at capture time."""
+        return [
+            {"index": index, "method": record['method'], "path": record['path'],
+             "captured": record['status'], "replayed": status}
+            for index, (record, status) in enumerate(zip(self.records, self.statuses))
+            if record.get('status') is not None and record['status'] != status
+        ]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "requests": len(self.records),
+            "total_ms": round(sum(self.durations_ns) / 1e6, 3),
+            "routes": self.routes(),
+            "statuses": self.statuses,
+            "requests_index": [f"{record['method']} {record['path']}" for record in self.records],
+            "captured_status_mismatches": self.captured_status_mismatches(),
+        }
+
+
+def replay(app, records: Iterable[dict], workers: int = 1) -> ReplayReport:
+    """
+    Sends every record to the app through `TestClient.request`, in parallel when `workers` > 1.
+    """
+    client = TestClient(app)
+    records = list(records)
+
+    def send(record):
+        started = perf_counter_ns()
+        response = client.request(record['method'], record['path'], headers=record.get('headers'),
+                                  body=record.get('body'), query_string=record.get('query', ''))
+        return response.status_code, perf_counter_ns() - started
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(send, records))
+    else:
+        results = [send(record) for record in records]
+    return ReplayReport(records, [status for status, _ in results], [duration for _, duration in results])
+
+
+def compare_reports(baseline: Dict[str, object], current: Dict[str, object]) -> Dict[str, object]:
+    """
+    Compares two `ReplayReport.to_dict()` results of the same capture, e.g. from two builds.
+    """
+    routes = {}
+    for route, stats in current['routes'].items():
+        previous = baseline['routes'].get(route)
+        if previous is None:
+            continue
+        routes[route] = {
+            "baseline_mean_us": previous['mean_us'],
+            "current_mean_us": stats['mean_us'],
+            "change": round(stats['mean_us'] / previous['mean_us'] - 1, 4) if previous['mean_us'] else None,
+        }
+
+    status_differences = [
+        {"index": index, "request": request, "baseline": before, "current": after}
+        for index, (request, before, after) in enumerate(
+            zip(current['requests_index'], baseline['statuses'], current['statuses']))
+        if before != after
+    ]
+    return {"routes": routes, "status_differences": status_differences}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pebarest.testing.replay',
+                                     description='Replays a traffic capture through TestClient.')
+    parser.add_argument('capture', help='Capture file, its rotated files are read too.')
+    parser.add_argument('--app', required=True, help="The application to replay against, as 'module:attribute'.")
+    parser.add_argument('-w', '--workers', type=int, default=1, help='Parallel replay threads.')
+    parser.add_argument('-o', '--output', help="Where to write the JSON report ('-' for stdout).")
+    parser.add_argument('-b', '--baseline', help='Report of a previous replay to compare against.')
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, '')
+    files = capture_files(args.capture) or [args.capture]
+    report = replay(import_string(args.app), read_capture(*files), args.workers).to_dict()
+
+    for route, stats in report['routes'].items():
+        print(f"{route:<48}{stats['count']:>8}{stats['mean_us']:>12.2f} us  {stats['statuses']}", file=sys.stderr)
+
+    if args.output:
+        data = json.dumps(report, indent=2)
+        if args.output == '-':
+            sys.stdout.write(data + '\n')
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(data + '\n')
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        comparison = compare_reports(json.load(f), report)
+    for route, change in comparison['routes'].items():
+        print(f"{route:<48}{change['baseline_mean_us']:>10.2f} -> {change['current_mean_us']:.2f} us", file=sys.stderr)
+    for difference in comparison['status_differences']:
+        print(f"status changed #{difference['index']} {difference['request']}: "
+              f"{difference['baseline']} -> {difference['current']}", file=sys.stderr)
+    return 1 if comparison['status_differences'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
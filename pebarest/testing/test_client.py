@@ -24,9 +24,10 @@ class TestClient:
     def __init__(self, app):
         self.app = app
 
-    def request(self, method, path, headers=None, body=None, json_data=None):
-        if headers is None:
-            headers = {}
+    def request(self, method, path, headers=None, body=None, json_data=None, query_string=''):
+        headers = dict(headers) if headers else {}
+        path, _, path_query = path.partition('?')
+        query_string = query_string or path_query
 
         body_bytes = b""
         if json_data is not None:
@@ -51,7 +52,7 @@ class TestClient:
             'wsgi.multiprocess': False,
             'wsgi.run_once': False,
             'CONTENT_LENGTH': str(len(body_bytes)),
-            'QUERY_STRING': ''
+            'QUERY_STRING': query_string
         }
 
         for k, v in headers.items():
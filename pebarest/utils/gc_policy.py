@@ -0,0 +1,218 @@
+import gc
+import os
+import threading
+
+from time import monotonic, perf_counter
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pebarest.metrics.registry import MetricsRegistry
+
+
+DEFAULT_PAUSE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class _PauseStats:
+    __slots__ = ('collections', 'in_requests', 'total_seconds', 'max_seconds', 'collected')
+
+    def __init__(self):
+        self.collections = 0
+        self.in_requests = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.collected = 0
+
+
+class GcPolicy:
+    """
+    Schedules the garbage collections of a worker around its requests, so the full collections of a large
+    heap don't pause the requests in flight. The App calls `request_started` and `request_finished` around
+    every request.
+
+    With `automatic` set, Python keeps collecting on its own with the raised `thresholds`, otherwise the
+    automatic collection is disabled and the policy runs them all. The young generation is collected when a
+    request finishes with more than `young_threshold` pending allocations, the other requests being done
+    (or with 4 times as many under constant load), the middle one every `thresholds[1]` young collections.
+    Full collections run in a background thread, once the worker is idle for `idle_delay` seconds. When none
+    ran for `max_full_interval` seconds, because the worker is never idle, the thread runs one as soon as at
+    most one request is in flight, and after twice that time whatever the load: that collection pauses the
+    requests in flight, the price of bounding the memory of a worker under constant load.
+
+    The pauses of every collection are recorded per generation, `report()` returns them, and they are
+    exported as the `pebarest_gc_pause_seconds` histogram by the App metrics when enabled.
+    """
+    automatic: bool
+    thresholds: Tuple[int, int, int]
+    young_threshold: int
+    idle_delay: Optional[float]
+    max_full_interval: Optional[float]
+
+    def __init__(
+            self,
+            automatic: bool = False,
+            thresholds: Tuple[int, int, int] = (50_000, 20, 100),
+            young_threshold: int = 20_000,
+            idle_delay: Optional[float] = 0.5,
+            max_full_interval: Optional[float] = 60.0,
+            pause_buckets: Sequence[float] = DEFAULT_PAUSE_BUCKETS
+    ):
+        if young_threshold < 1:
+            raise ValueError('young_threshold must be positive.')
+        self.automatic = automatic
+        self.thresholds = thresholds
+        self.young_threshold = young_threshold
+        self.idle_delay = idle_delay
+        self.max_full_interval = max_full_interval
+        self.pause_buckets = tuple(pause_buckets)
+        self._pause_histogram = None
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._last_request = monotonic()
+        self._last_full = monotonic()
+        self._young_collections = 0
+        self._collections_since_full = 0
+        self._collection_started: Optional[float] = None
+        self._collection_in_request = False
+        self._stats: Dict[int, _PauseStats] = {}
+        self._installed = False
+        self._previous: Optional[Tuple[bool, Tuple[int, int, int]]] = None
+        self._stop = threading.Event()
+        self._idle_thread: Optional[threading.Thread] = None
+
+    def _reset_after_fork(self):
+        # The child inherits the gc settings but not the idle thread: the App installs the policy again
+        # at the startup of the worker, keeping the settings found by the parent.
+        previous = self._previous
+        self._reset()
+        self._previous = previous
+
+    def install(self):
+        """Applies the policy to the current process. The App calls it at startup."""
+        if self._installed:
+            return
+        if self._previous is None:
+            self._previous = (gc.isenabled(), gc.get_threshold())
+        if self.automatic:
+            gc.set_threshold(*self.thresholds)
+            gc.enable()
+        else:
+            gc.disable()
+        if self._on_collection not in gc.callbacks:
+            gc.callbacks.append(self._on_collection)
+        if self.idle_delay is not None or self.max_full_interval is not None:
+            self._stop = threading.Event()
+            self._idle_thread = threading.Thread(target=self._idle_loop, name='pebarest-gc', daemon=True)
+            self._idle_thread.start()
+        self._installed = True
+
+    def uninstall(self):
+        """Restores the gc settings found by `install`."""
+        if not self._installed:
+            return
+        self._installed = False
+        self._stop.set()
+        if self._on_collection in gc.callbacks:
+            gc.callbacks.remove(self._on_collection)
+        enabled, thresholds = self._previous
+        self._previous = None
+        gc.set_threshold(*thresholds)
+        if enabled:
+            gc.enable()
+
+    def bind_metrics(self, registry: 'MetricsRegistry', prefix: str = 'pebarest'):
+        """Exports the collection pauses in the registry, labeled by generation and `in_request`."""
+        name = f'{prefix}_gc_pause_seconds'
+        histogram = registry.get(name)
+        if histogram is None:
+            histogram = registry.histogram(name, 'Garbage collection pauses.', ('generation', 'in_request'),
+                                           self.pause_buckets)
+        self._pause_histogram = histogram
+
+    def request_started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def request_finished(self):
+        """Must run for every `request_started`, even when the request failed: the App calls it in a finally."""
+        # Collecting here still delays the response of this request, so it is counted in flight meanwhile.
+        try:
+            self._last_request = monotonic()
+            pending = gc.get_count()[0]
+            if pending >= self.young_threshold and (self._in_flight == 1 or pending >= self.young_threshold * 4):
+                self._young_collections += 1
+                gc.collect(1 if self._young_collections % self.thresholds[1] == 0 else 0)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _idle_loop(self):
+        stop = self._stop
+        delay = self.idle_delay
+        max_interval = self.max_full_interval
+        while not stop.wait(delay if delay is not None else min(max_interval / 10, 1.0)):
+            now = monotonic()
+            if max_interval is not None:
+                overdue = now - self._last_full
+                if overdue >= max_interval * 2 or (overdue >= max_interval and self._in_flight <= 1):
+                    gc.collect()
+                    continue
+            if delay is None or self._in_flight or now - self._last_request < delay:
+                continue
+            if self._collections_since_full or gc.get_count()[0] >= self.young_threshold:
+                gc.collect()
+
+    def _on_collection(self, phase: str, info: dict):
+        if phase == 'start':
+            # Read last: other threads can run until the callback returns, not during the collection.
+            self._collection_started = perf_counter()
+            self._collection_in_request = self._in_flight > 0
+            return
+        started = self._collection_started
+        if started is None:
+            return
+        self._collection_started = None
+        duration = perf_counter() - started
+        generation = info['generation']
+        in_request = self._collection_in_request
+        stats = self._stats.get(generation)
+        if stats is None:
+            stats = self._stats[generation] = _PauseStats()
+        stats.collections += 1
+        stats.in_requests += in_request
+        stats.total_seconds += duration
+        stats.max_seconds = max(stats.max_seconds, duration)
+        stats.collected += info.get('collected', 0)
+        if generation == 2:
+            self._last_full = monotonic()
+            self._collections_since_full = 0
+        else:
+            self._collections_since_full += 1
+        histogram = self._pause_histogram
+        if histogram is not None:
+            histogram.labels(str(generation), 'true' if in_request else 'false').observe(duration)
+
+    def report(self) -> Dict[str, object]:
+        generations: List[Dict[str, object]] = []
+        for generation, stats in sorted(self._stats.items()):
+            generations.append({
+                'generation': generation,
+                'collections': stats.collections,
+                'in_requests': stats.in_requests,
+                'total_ms': round(stats.total_seconds * 1000, 3),
+                'max_ms': round(stats.max_seconds * 1000, 3),
+                'collected': stats.collected,
+            })
+        return {
+            'installed': self._installed,
+            'automatic': gc.isenabled(),
+            'in_flight': self._in_flight,
+            'pending': gc.get_count()[0],
+            'generations': generations,
+        }
+
+
+__all__ = ['GcPolicy', 'DEFAULT_PAUSE_BUCKETS']
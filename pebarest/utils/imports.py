@@ -0,0 +1,26 @@
+import importlib
+
+from typing import Any
+
+
+def import_string(target: str, default_attribute: str = 'app') -> Any:
+    """
+    Imports an object from a 'module:attribute' (or 'module.attribute') path.
+    A bare module name returns its `default_attribute`.
+    """
+    if ':' in target:
+        module_name, attribute = target.split(':', 1)
+    else:
+        module_name, attribute = target, default_attribute
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            module_name, _, attribute = target.rpartition('.')
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, attribute)
+    except AttributeError:
+        raise ImportError(f"Module '{module_name}' has no attribute '{attribute}'.") from None
+
+
+__all__ = ['import_string']
@@ -1,11 +1,20 @@
 from datetime import datetime, date
-from typing import Any
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+
+# A projection maps each kept field to the projection of its sub fields, None keeps the whole value.
+Projection = Dict[str, Optional['Projection']]
 
 
 class JsonClass:
     def __iter__(self):
         raise NotImplementedError()
 
+    def iter_fields(self, names: Iterable[str]) -> Iterator[Tuple[str, Any]]:
+        """Yields the (name, value) pairs of the given fields only."""
+        names = set(names)
+        return ((key, val) for key, val in self if key in names)
+
     def __str__(self):
         return self.__repr__()
 
@@ -50,10 +59,59 @@ def to_serializable(value: Any) -> str:
         raise TypeError(f"Type {type(value)} is not supported.")
 
 
-def dumps(data: Any) -> bytes:
+def parse_fields(fields: str) -> Optional[Projection]:
+    """
+    Parses a sparse fieldset such as "id,name,address.city" into a projection tree,
+    {"id": None, "name": None, "address": {"city": None}}. Returns None when no field is given.
+
+    :param fields: Comma separated field paths, nested fields joined by dots.
+    :return: The projection tree.
+    """
+    projection: Projection = {}
+    for path in fields.split(','):
+        keys = [key for key in path.strip().split('.') if key]
+        if not keys:
+            continue
+        node = projection
+        for key in keys[:-1]:
+            if key in node and node[key] is None:
+                # The whole parent is already kept.
+                break
+            node = node.setdefault(key, {})
+        else:
+            node[keys[-1]] = None
+    return projection or None
+
+
+def to_serializable_projected(value: Any, projection: Optional[Projection]) -> str:
+    """
+    Same as `to_serializable`, keeping only the fields of the projection. Excluded fields are never
+    serialized, and for `JsonClass` values such as `BaseModel` never read. Lists are projected item by item.
+
+    :param value: Value to be converted.
+    :param projection: Projection tree, see `parse_fields`.
+    :return: Serializable string.
+    """
+    if projection is None:
+        return to_serializable(value)
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{to_double_quoted_string(key)}: {to_serializable_projected(value[key], sub)}"
+                               for key, sub in projection.items() if key in value) + "}"
+    if isinstance(value, JsonClass):
+        return "{" + ", ".join(f"{to_double_quoted_string(key)}: {to_serializable_projected(val, projection[key])}"
+                               for key, val in value.iter_fields(projection)) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(to_serializable_projected(item, projection) for item in value) + "]"
+    return to_serializable(value)
+
+
+def dumps(data: Any, projection: Optional[Projection] = None) -> bytes:
     """
     Serializes various data types to bytes (UTF-8), in a format similar to JSON.
+    With a projection only its fields are serialized.
     """
+    if projection is not None:
+        return to_serializable_projected(data, projection).encode("utf-8")
     return to_serializable(data).encode("utf-8")
 
 
@@ -1,4 +1,13 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+import threading
+
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
 
 
 class PebaColoredFormatter(logging.Formatter):
@@ -22,14 +31,30 @@ class PebaColoredFormatter(logging.Formatter):
         logging.CRITICAL: bold_red + format_str + reset
     }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._formatters = {
+            level: logging.Formatter(log_fmt, datefmt='%Y-%m-%d %H:%M:%S')
+            for level, log_fmt in self.FORMATS.items()
+        }
+        self._default_formatter = logging.Formatter(None, datefmt='%Y-%m-%d %H:%M:%S')
+
     def format(self, record):
-        log_fmt = self.FORMATS.get(record.levelno)
-        formatter = logging.Formatter(log_fmt, datefmt='%Y-%m-%d %H:%M:%S')
+        formatter = self._formatters.get(record.levelno, self._default_formatter)
         return formatter.format(record)
 
 
-default_handler = logging.StreamHandler()
-default_handler.setFormatter(PebaColoredFormatter())
+_default_handler = None
+
+
+def get_default_handler() -> logging.Handler:
+    """Returns the colored stderr handler shared by the application loggers, created on first use."""
+    global _default_handler
+    if _default_handler is None:
+        _default_handler = logging.StreamHandler()
+        _default_handler.setFormatter(PebaColoredFormatter())
+    return _default_handler
+
 
 def has_level_handler(logger: logging.Logger) -> bool:
     level = logger.getEffectiveLevel()
@@ -54,6 +79,128 @@ def create_logger(import_name: str, is_debug: bool) -> logging.Logger:
         logger.setLevel(logging.DEBUG)
 
     if not has_level_handler(logger):
-        logger.addHandler(default_handler)
+        logger.addHandler(get_default_handler())
 
     return logger
+
+
+ACCESS_LOG_FIELDS = ('method', 'route', 'status', 'duration_ms', 'bytes')
+
+
+class AccessJsonFormatter(logging.Formatter):
+    """Formats access log records as one JSON object per line."""
+
+    def format(self, record):
+        data = {"time": self.formatTime(record, '%Y-%m-%dT%H:%M:%S'), "level": record.levelname}
+        for field in ACCESS_LOG_FIELDS:
+            data[field] = getattr(record, field, None)
+        return json.dumps(data)
+
+
+class _AccessQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # The record only holds primitives, the formatting is left to the listener thread.
+        return record
+
+
+class AccessLogger:
+    """
+    Writes one structured record (method, route template, status, duration and bytes) per request.
+    The request thread only enqueues the record, formatting and writing happen on a background thread.
+    Like the App logger did, 1xx and 3xx responses are logged as info and warnings, and the errors always.
+    Successful (2xx) responses are logged with the `success_sample_rate` probability, none by default.
+    With `json_format`, the records are written by `AccessJsonFormatter` instead of the colored one.
+    """
+    logger: logging.Logger
+    handler: logging.Handler
+    success_sample_rate: float
+
+    def __init__(
+            self,
+            name: str = 'pebarest.access',
+            handler: Optional[logging.Handler] = None,
+            success_sample_rate: float = 0.0,
+            is_debug: bool = False,
+            json_format: bool = False
+    ):
+        if not 0.0 <= success_sample_rate <= 1.0:
+            raise ValueError('success_sample_rate must be between 0 and 1.')
+        if handler is None:
+            handler = logging.StreamHandler()
+            if not json_format:
+                handler.setFormatter(PebaColoredFormatter())
+        if json_format:
+            handler.setFormatter(AccessJsonFormatter())
+
+        self.handler = handler
+        self.success_sample_rate = success_sample_rate
+        self.logger = logging.getLogger(name)
+        self.logger.propagate = False
+        if not self.logger.level:
+            if is_debug:
+                self.logger.setLevel(logging.DEBUG)
+            elif success_sample_rate > 0:
+                # The sampled 2xx records are infos, dropped by the default WARNING level of the root logger.
+                self.logger.setLevel(logging.INFO)
+
+        self._queue = None
+        self._queue_handler = None
+        self._listener = None
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+        atexit.register(self.stop)
+
+    def start(self):
+        """Starts the background writer. Called automatically by the first record."""
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._queue = queue.SimpleQueue()
+            self._queue_handler = _AccessQueueHandler(self._queue)
+            self.logger.addHandler(self._queue_handler)
+            self._listener = QueueListener(self._queue, self.handler, respect_handler_level=True)
+            self._listener.start()
+
+    def stop(self):
+        """Flushes the pending records and stops the background writer."""
+        with self._lock:
+            if self._listener is None:
+                return
+            self.logger.removeHandler(self._queue_handler)
+            self._listener.stop()
+            self._listener = None
+
+    def _reset_after_fork(self):
+        # The writer thread doesn't survive a fork, the child starts its own on the next record.
+        if self._queue_handler is not None:
+            self.logger.removeHandler(self._queue_handler)
+        self._queue = None
+        self._queue_handler = None
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def log(self, method: str, route: str, status: int, duration: float, size: int):
+        """
+        :param duration: Request duration in seconds.
+        :param size: Response body size in bytes.
+        """
+        if 200 <= status < 300:
+            rate = self.success_sample_rate
+            if rate < 1.0 and (not rate or random.random() >= rate):
+                return
+            level = logging.INFO
+        elif status < 400:
+            level = logging.WARNING if status >= 300 else logging.INFO
+        else:
+            level = logging.ERROR if status < 500 else logging.CRITICAL
+
+        if not self.logger.isEnabledFor(level):
+            return
+        if self._listener is None:
+            self.start()
+
+        duration_ms = round(duration * 1000, 3)
+        self.logger.log(
+            level, '%s %s %s %sms %sB', method, route, status, duration_ms, size,
+            extra={'method': method, 'route': route, 'status': status, 'duration_ms': duration_ms, 'bytes': size}
+        )
@@ -0,0 +1,181 @@
+import os
+import threading
+
+from typing import Any, Callable, Dict, Optional, TYPE_CHECKING
+
+from pebarest.exceptions import OffloadTimeoutError
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+    from pebarest.models.request import Request
+
+
+CPU_BOUND_ATTRIBUTE = '__pebarest_cpu_bound__'
+
+
+class CpuBoundOptions:
+    __slots__ = ('timeout',)
+
+    def __init__(self, timeout: Optional[float]):
+        self.timeout = timeout
+
+
+def cpu_bound(function: Optional[Callable] = None, *, timeout: Optional[float] = None):
+    """
+    Marks a resource handler as CPU-bound: it runs in a worker process of the resource `offloader`
+    (the App one), so it doesn't hold the GIL of the serving process. Use it as `@cpu_bound` or
+    `@cpu_bound(timeout=10)`, the timeout overrides the offloader one.
+
+    The handler receives a `RequestSnapshot` (method, body, params, path_params and client_info) and
+    runs on a bare instance of its resource class, created without `__init__`: it can use the class
+    attributes but not the instance state. Its resource class must be importable by the workers, and
+    its return value picklable.
+    """
+    def mark(handler: Callable) -> Callable:
+        setattr(handler, CPU_BOUND_ATTRIBUTE, CpuBoundOptions(timeout))
+        return handler
+    return mark(function) if function is not None else mark
+
+
+class RequestSnapshot:
+    """Picklable part of a `Request`, sent to the offloaded handlers."""
+    __slots__ = ('method', 'body', 'params', 'path_params', 'client_info')
+
+    def __init__(self, method: str, body, params: dict, path_params: dict, client_info: Optional[dict]):
+        self.method = method
+        self.body = body
+        self.params = params
+        self.path_params = path_params
+        self.client_info = client_info
+
+    @classmethod
+    def of(cls, request: 'Request') -> 'RequestSnapshot':
+        return cls(request.method, request.body, request.params, request.path_params, request.client_info)
+
+    def __reduce__(self):
+        return self.__class__, (self.method, self.body, self.params, self.path_params, self.client_info)
+
+
+class ProcessOffloader:
+    """
+    Process pool running the `cpu_bound` handlers, created on first use with `max_workers` processes
+    (the CPU count by default). A handler running for longer than `timeout` seconds answers a 504,
+    its worker finishes the task in the background. A crashed worker answers a 500 to the requests
+    running in the pool at that time, and the pool is replaced for the next ones.
+
+    Workers are started with `mp_context` ('forkserver' by default where available, then 'spawn'),
+    forking a threaded server is unsafe. The pool is scoped to the process that created it.
+    """
+    max_workers: Optional[int]
+    timeout: Optional[float]
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = 30.0,
+                 mp_context: Optional[str] = None, max_tasks_per_child: Optional[int] = None):
+        if max_workers is not None and max_workers < 1:
+            raise ValueError('max_workers must be positive.')
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.mp_context = mp_context
+        self.max_tasks_per_child = max_tasks_per_child
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._executor: Optional['ProcessPoolExecutor'] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> 'ProcessPoolExecutor':
+        executor = self._executor
+        if executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._create_executor()
+                executor = self._executor
+        return executor
+
+    def _create_executor(self) -> 'ProcessPoolExecutor':
+        # concurrent.futures and multiprocessing are only imported when a handler is offloaded.
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        method = self.mp_context
+        if method is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        kwargs = {}
+        if self.max_tasks_per_child is not None:
+            kwargs['max_tasks_per_child'] = self.max_tasks_per_child
+        return ProcessPoolExecutor(self.max_workers, multiprocessing.get_context(method), **kwargs)
+
+    def run(self, resource_class: type, method_name: str, snapshot: RequestSnapshot,
+            timeout: Optional[float] = None) -> Any:
+        """Calls `resource_class.method_name` with the snapshot in a worker and returns its result."""
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+        from concurrent.futures.process import BrokenProcessPool
+
+        timeout = self.timeout if timeout is None else timeout
+        executor = self.executor
+        try:
+            future = executor.submit(_call_handler, resource_class, method_name, snapshot)
+        except BrokenProcessPool:
+            # Broken by an earlier request, this one didn't run yet: it goes to a new pool.
+            self._replace(executor)
+            executor = self.executor
+            future = executor.submit(_call_handler, resource_class, method_name, snapshot)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise OffloadTimeoutError(f'The handler did not finish within {timeout}s.')
+        except BrokenProcessPool:
+            self._replace(executor)
+            raise
+
+    def _replace(self, broken: 'ProcessPoolExecutor'):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_default_offloader: Optional[ProcessOffloader] = None
+_default_lock = threading.Lock()
+
+
+def default_offloader() -> ProcessOffloader:
+    """Offloader of the resources that aren't served by an App with an `offloader`."""
+    global _default_offloader
+    if _default_offloader is None:
+        with _default_lock:
+            if _default_offloader is None:
+                _default_offloader = ProcessOffloader()
+    return _default_offloader
+
+
+_worker_resources: Dict[type, Any] = {}
+
+
+def _call_handler(resource_class: type, method_name: str, snapshot: RequestSnapshot):
+    """Runs in the worker process."""
+    resource = _worker_resources.get(resource_class)
+    if resource is None:
+        resource = _worker_resources[resource_class] = resource_class.__new__(resource_class)
+    try:
+        return getattr(resource_class, method_name)(resource, snapshot)
+    except Exception as e:
+        # An exception failing to unpickle in the serving process would break the whole pool.
+        import pickle
+        try:
+            pickle.loads(pickle.dumps(e))
+        except Exception:
+            raise RuntimeError(f'{type(e).__name__}: {e}') from None
+        raise
+
+
+__all__ = ['cpu_bound', 'ProcessOffloader', 'RequestSnapshot', 'default_offloader']
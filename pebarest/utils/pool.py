@@ -0,0 +1,165 @@
+import os
+import threading
+
+from collections import deque
+from time import monotonic
+from typing import Callable, Deque, Generic, Optional, Tuple, TypeVar
+
+from pebarest.exceptions import PoolTimeoutError
+
+
+T = TypeVar("T")
+
+
+class Pool(Generic[T]):
+    """
+    Bounded pool of reusable objects, e.g. database or upstream connections.
+
+    At most `max_size` objects exist at once, `acquire` waits up to `acquire_timeout` seconds for one
+    to be released and then raises `PoolTimeoutError`. Idle objects older than `max_idle` seconds and
+    the ones failing `health_check` are closed instead of reused.
+
+    The pool is scoped to the worker process: after a fork the child starts empty, the objects created
+    by the parent are left to it and never closed or reused by the child.
+    """
+    max_size: int
+    acquire_timeout: Optional[float]
+    max_idle: Optional[float]
+
+    def __init__(
+            self,
+            factory: Callable[[], T],
+            max_size: int = 10,
+            acquire_timeout: Optional[float] = 5.0,
+            max_idle: Optional[float] = None,
+            health_check: Optional[Callable[[T], bool]] = None,
+            close: Optional[Callable[[T], None]] = None
+    ):
+        if max_size < 1:
+            raise ValueError('max_size must be positive.')
+        self.factory = factory
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+        self.health_check = health_check
+        self._close = close
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._idle: Deque[Tuple[T, float]] = deque()
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+
+    @property
+    def size(self) -> int:
+        """Objects currently created by the pool, idle or in use."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def acquire(self, timeout: Optional[float] = None) -> T:
+        """
+        Returns an idle object, or a new one while the pool is below `max_size`.
+
+        :param timeout: Seconds to wait for a released object, `acquire_timeout` by default.
+        """
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            idle = self._take(timeout, deadline)
+            if idle is None:
+                break
+            item, released_at = idle
+            # The checks run outside the lock, they may do I/O.
+            if self.max_idle is not None and monotonic() - released_at > self.max_idle:
+                self._discard(item)
+            elif self.health_check is not None and not self._healthy(item):
+                self._discard(item)
+            else:
+                return item
+        try:
+            return self.factory()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def _take(self, timeout: Optional[float], deadline: Optional[float]) -> Optional[Tuple[T, float]]:
+        """Pops an idle object, or returns None after reserving room for a new one."""
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutError('The pool is closed.')
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeoutError(f'No pooled object was released within {timeout}s.')
+                self._condition.wait(remaining)
+
+    def release(self, item: T, discard: bool = False):
+        """
+        Gives an object back to the pool, `discard` closes it instead, e.g. after a connection error.
+        """
+        with self._condition:
+            if not (discard or self._closed):
+                self._idle.append((item, monotonic()))
+                self._condition.notify()
+                return
+        self._discard(item)
+
+    def lease(self) -> '_Lease[T]':
+        """Context manager that acquires an object and releases it on exit, discarding it on errors."""
+        return _Lease(self)
+
+    def close(self):
+        """Closes the idle objects, the ones in use are closed when released."""
+        with self._condition:
+            self._closed = True
+            idle = [item for item, _ in self._idle]
+            self._idle.clear()
+            self._condition.notify_all()
+        for item in idle:
+            self._discard(item)
+
+    def _healthy(self, item: T) -> bool:
+        try:
+            return bool(self.health_check(item))
+        except Exception:
+            return False
+
+    def _discard(self, item: T):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        if self._close is not None:
+            try:
+                self._close(item)
+            except Exception:
+                pass
+
+
+class _Lease(Generic[T]):
+    __slots__ = ('pool', 'item')
+
+    def __init__(self, pool: Pool[T]):
+        self.pool = pool
+        self.item = None
+
+    def __enter__(self) -> T:
+        self.item = self.pool.acquire()
+        return self.item
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.pool.release(self.item, discard=exc_type is not None)
+
+
+__all__ = ['Pool']
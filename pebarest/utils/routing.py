@@ -3,17 +3,27 @@ import re
 from typing import Optional
 
 
-_PARAM_RE = re.compile(r'\{(\w+)\}')
+_PARAM_RE = re.compile(r'\{(\w+)(?::(\w+))?\}')
+
+# {name} matches one path segment, {name:path} the rest of the path, slashes included.
+_CONVERTERS = {None: '[^/]+', 'path': '.*'}
+
+
+def _param_regex(match: re.Match) -> str:
+    name, converter = match.groups()
+    if converter not in _CONVERTERS:
+        raise ValueError(f"Unknown path converter '{converter}'.")
+    return f'(?P<{name}>{_CONVERTERS[converter]})'
 
 
 def compile_path(path: str) -> Optional[re.Pattern]:
-    """Convert a path template like /users/{id} into a compiled regex.
+    """Convert a path template like /users/{id} or /static/{path:path} into a compiled regex.
 
     Returns None for static paths that contain no parameters.
     """
     if not _PARAM_RE.search(path):
         return None
-    regex = _PARAM_RE.sub(r'(?P<\1>[^/]+)', path)
+    regex = _PARAM_RE.sub(_param_regex, path)
     return re.compile(f'^{regex}$')
 
 
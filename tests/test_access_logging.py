@@ -0,0 +1,53 @@
+import io
+import logging
+import unittest
+
+from pebarest import App
+from pebarest.models import Resource
+from pebarest.utils.logging import AccessLogger
+
+
+class _ItemsResource(Resource):
+    def get(self, request):
+        return {'id': 1}
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+def _environ(path: str) -> dict:
+    return {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'wsgi.input': io.BytesIO()}
+
+
+class AccessLoggerTest(unittest.TestCase):
+    def _serve(self, access_logger: AccessLogger):
+        app = App('access_test', default_headers={'Content-Type': 'application/json'}, is_debug=False,
+                  access_log=access_logger)
+        app.add_route('/items', _ItemsResource())
+        for path in ('/items', '/missing'):
+            for _ in app(_environ(path), lambda status, headers, exc_info=None: None):
+                pass
+        access_logger.stop()
+
+    def test_sampled_success_is_written_outside_debug(self):
+        handler = _ListHandler()
+        self._serve(AccessLogger('access_test.sampled', handler=handler, success_sample_rate=1.0, json_format=True))
+        self.assertEqual(len(handler.messages), 2)
+        self.assertIn('"status": 200', handler.messages[0])
+        self.assertIn('"status": 404', handler.messages[1])
+
+    def test_success_is_not_written_by_default(self):
+        handler = _ListHandler()
+        self._serve(AccessLogger('access_test.default', handler=handler))
+        self.assertEqual(len(handler.messages), 1)
+        self.assertIn('404', handler.messages[0])
+
+
+if __name__ == '__main__':
+    unittest.main()